@@ -0,0 +1,17 @@
+from rest_framework.filters import BaseFilterBackend
+from services import movie_search
+
+
+class MovieSearchFilter(BaseFilterBackend):
+    """?search=: tìm phim không dấu, xếp theo độ liên quan nếu không có
+    ?ordering= (xem services.movie_search)"""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        return movie_search.search(
+            queryset, query, ordered=not request.query_params.get("ordering")
+        )
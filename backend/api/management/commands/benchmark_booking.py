@@ -0,0 +1,259 @@
+import logging
+import random
+import statistics
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import (
+    Auditorium,
+    Booking,
+    Movie,
+    Showtime,
+    ShowtimeInventory,
+    Ticket,
+    User,
+)
+from api.serializers.auditorium import AuditoriumCreateSerializer
+from services import holds, inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo tải POST /api/booking/ khi nhiều client cùng tranh một nhóm ghế: "
+        "throughput, độ trễ p50/p95/p99, tỉ lệ xung đột và ghế bị bán trùng. "
+        "Nên chạy trên Postgres (SQLite khóa cả file khi ghi)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Tổng số lượt đặt vé"
+        )
+        parser.add_argument(
+            "--threads", type=int, default=50, help="Số client chạy song song"
+        )
+        parser.add_argument(
+            "--seats-per-booking", type=int, default=2, help="Số ghế mỗi lượt đặt"
+        )
+        parser.add_argument(
+            "--hot-seats",
+            type=int,
+            default=40,
+            help="Số ghế (ở giữa phòng) mà các client cùng tranh",
+        )
+        parser.add_argument(
+            "--lock-strategy",
+            action="append",
+            dest="lock_strategies",
+            choices=holds.LOCK_STRATEGIES,
+            help="Chiến lược khóa cần đo (lặp lại để so sánh)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed ngẫu nhiên")
+        parser.add_argument(
+            "--keep", action="store_true", help="Giữ lại dữ liệu benchmark"
+        )
+
+    def handle(self, *args, **options):
+        if options["threads"] < 1 or options["requests"] < 1:
+            raise CommandError("--threads và --requests phải lớn hơn 0")
+        if options["seats_per_booking"] > options["hot_seats"]:
+            raise CommandError("--seats-per-booking không được lớn hơn --hot-seats")
+
+        strategies = options["lock_strategies"] or [holds.get_lock_strategy()]
+        fixture = self.seed(options["threads"])
+        try:
+            hot_seats = self.pick_hot_seats(fixture["showtime"], options["hot_seats"])
+            for strategy in strategies:
+                self.reset(fixture["showtime"])
+                with override_settings(
+                    BOOKING_LOCK_STRATEGY=strategy,
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                ):
+                    results, elapsed = self.run(fixture, hot_seats, options)
+                self.report(strategy, fixture["showtime"], results, elapsed)
+        finally:
+            if not options["keep"]:
+                self.cleanup(fixture)
+
+    def seed(self, user_count):
+        """Tạo phòng chiếu 12x20, phim, suất chiếu và user cho benchmark"""
+        tag = uuid.uuid4().hex[:8]
+        serializer = AuditoriumCreateSerializer(
+            data={
+                "name": f"bench-{tag}",
+                "standard_row_count": 7,
+                "vip_row_count": 3,
+                "couple_row_count": 2,
+                "seats_per_row": 20,
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        auditorium = serializer.save()
+
+        movie = Movie.objects.create(title=f"Benchmark {tag}", duration_min=120)
+        start_time = timezone.now() + timedelta(days=7)
+        showtime = Showtime.objects.create(
+            movie=movie,
+            auditorium=auditorium,
+            start_time=start_time,
+            end_time=start_time + timedelta(minutes=150),
+            base_price=100000,
+        )
+        inventory.ensure_inventory(showtime)
+
+        users = [
+            User(username=f"bench-{tag}-{i}", email=f"bench-{tag}-{i}@example.com")
+            for i in range(user_count)
+        ]
+        for user in users:
+            user.set_unusable_password()
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith=f"bench-{tag}-"))
+
+        self.stdout.write(
+            f"Seed: phòng {auditorium.name} ({auditorium.seats.count()} ghế), "
+            f"{len(users)} user"
+        )
+        return {
+            "auditorium": auditorium,
+            "movie": movie,
+            "showtime": showtime,
+            "users": users,
+        }
+
+    def pick_hot_seats(self, showtime, count):
+        """Các ghế gần giữa phòng nhất - nơi mọi người cùng muốn ngồi"""
+        seats = list(
+            showtime.auditorium.seats.values_list("id", "row_label", "seat_number")
+        )
+        rows = sorted({row_label for _, row_label, _ in seats})
+        middle_row = (len(rows) - 1) / 2
+        middle_seat = (max(number for _, _, number in seats) + 1) / 2
+        seats.sort(
+            key=lambda seat: abs(rows.index(seat[1]) - middle_row) * 2
+            + abs(seat[2] - middle_seat)
+        )
+        return [str(seat_id) for seat_id, _, _ in seats[:count]]
+
+    def reset(self, showtime):
+        Booking.objects.filter(showtime=showtime).delete()
+        inventory.rebuild_inventory(showtime.id)
+
+    def run(self, fixture, hot_seats, options):
+        showtime_id = str(fixture["showtime"].id)
+        rng = random.Random(options["seed"])
+        attempts = [
+            rng.sample(hot_seats, options["seats_per_booking"])
+            for _ in range(options["requests"])
+        ]
+        results = []
+        results_lock = threading.Lock()
+        next_attempt = iter(range(len(attempts)))
+        start = threading.Barrier(options["threads"])
+
+        def worker(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            local_results = []
+            try:
+                start.wait()
+                while True:
+                    with results_lock:
+                        i = next(next_attempt, None)
+                    if i is None:
+                        break
+                    began = time.perf_counter()
+                    try:
+                        response = client.post(
+                            "/api/booking/",
+                            {"showtime": showtime_id, "seat_ids": attempts[i]},
+                            format="json",
+                        )
+                        status_code = response.status_code
+                    except Exception:
+                        status_code = None
+                    local_results.append((status_code, time.perf_counter() - began))
+            finally:
+                connection.close()
+                with results_lock:
+                    results.extend(local_results)
+
+        # Mỗi lượt 409 sinh một dòng log cảnh báo, tắt đi trong lúc đo
+        request_logger = logging.getLogger("django.request")
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+
+        threads = [
+            threading.Thread(target=worker, args=(user,))
+            for user in fixture["users"][: options["threads"]]
+        ]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        request_logger.setLevel(previous_level)
+        return results, elapsed
+
+    def report(self, strategy, showtime, results, elapsed):
+        latencies = sorted(latency * 1000 for _, latency in results)
+        created = sum(1 for status_code, _ in results if status_code == 201)
+        conflicts = sum(1 for status_code, _ in results if status_code == 409)
+        errors = len(results) - created - conflicts
+
+        double_sold = (
+            Ticket.objects.filter(showtime=showtime)
+            .active()
+            .values("seat")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .count()
+        )
+        counts = inventory.count_inventory(showtime.id)
+        current = ShowtimeInventory.objects.get(showtime=showtime)
+        drift = any(getattr(current, field) != value for field, value in counts.items())
+
+        if len(latencies) > 1:
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0
+
+        self.stdout.write(f"\n== Chiến lược khóa: {strategy} ==")
+        self.stdout.write(
+            f"Lượt đặt: {len(results)} trong {elapsed:.2f}s "
+            f"({len(results) / elapsed:.1f} req/s)"
+        )
+        self.stdout.write(f"Độ trễ (ms): p50={p50:.1f} p95={p95:.1f} p99={p99:.1f}")
+        self.stdout.write(
+            f"Thành công: {created}, xung đột: {conflicts} "
+            f"({conflicts / len(results) * 100:.1f}%), lỗi khác: {errors}"
+        )
+        self.stdout.write(f"Ghế đã giữ: {counts['reserved_count']}")
+
+        if double_sold or drift or errors:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Ghế bán trùng: {double_sold}, bộ đếm lệch: {drift}, "
+                    f"lỗi khác: {errors}"
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Không có ghế bán trùng"))
+
+    def cleanup(self, fixture):
+        Booking.objects.filter(showtime=fixture["showtime"]).delete()
+        fixture["showtime"].delete()
+        fixture["movie"].delete()
+        Auditorium.objects.filter(pk=fixture["auditorium"].pk).delete()
+        User.objects.filter(pk__in=[user.pk for user in fixture["users"]]).delete()
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Showtime, ShowtimeInventory
+from services import inventory
+
+
+class Command(BaseCommand):
+    help = "Kiểm tra và tính lại bộ đếm ghế (ShowtimeInventory) cho các suất chiếu"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--showtime",
+            action="append",
+            dest="showtime_ids",
+            help="Chỉ xử lý suất chiếu này (có thể lặp lại)",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Chỉ báo cáo các bộ đếm bị lệch, không ghi lại",
+        )
+
+    def handle(self, *args, **options):
+        showtimes = Showtime.objects.order_by("start_time")
+        if options["showtime_ids"]:
+            showtimes = showtimes.filter(id__in=options["showtime_ids"])
+            if showtimes.count() != len(set(options["showtime_ids"])):
+                raise CommandError("Một số suất chiếu không tồn tại")
+
+        existing = {
+            inv.showtime_id: inv
+            for inv in ShowtimeInventory.objects.filter(
+                showtime__in=showtimes
+            )
+        }
+
+        checked = drifted = 0
+        for showtime_id in showtimes.values_list("id", flat=True).iterator():
+            checked += 1
+            counts = inventory.count_inventory(showtime_id)
+            current = existing.get(showtime_id)
+            if current is not None and all(
+                getattr(current, field) == value for field, value in counts.items()
+            ):
+                continue
+
+            drifted += 1
+            self.stdout.write(f"{showtime_id}: {self._describe(current)} -> {counts}")
+            if not options["check"]:
+                inventory.rebuild_inventory(showtime_id)
+
+        action = "lệch" if options["check"] else "đã tính lại"
+        self.stdout.write(
+            self.style.SUCCESS(f"Kiểm tra {checked} suất chiếu, {drifted} {action}")
+        )
+
+    def _describe(self, current):
+        if current is None:
+            return "chưa có bộ đếm"
+        return {
+            "total_seats": current.total_seats,
+            "reserved_count": current.reserved_count,
+            "paid_count": current.paid_count,
+            "checked_in_count": current.checked_in_count,
+            "seat_version": current.seat_version,
+        }
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from services import movie_search
+
+
+class Command(BaseCommand):
+    help = "Tính lại Movie.search_text (tìm kiếm không dấu) cho tất cả phim"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Số phim mỗi lần bulk_update",
+        )
+
+    def handle(self, *args, **options):
+        updated = movie_search.reindex(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Đã cập nhật {updated} phim"))
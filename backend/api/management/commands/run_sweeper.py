@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from services import expiry, idempotency, scheduling
+from services.locks import advisory_lock
+
+# Tên khóa leader: chỉ một sweeper chạy job tại một thời điểm
+LEADER_LOCK = "api.run_sweeper"
+
+
+class Command(BaseCommand):
+    # Sự kiện nhả ghế khi hết hạn tới luồng SSE qua SEAT_EVENT_BROKER; với
+    # InMemoryBroker chúng ở lại trong process này và người xem không nhận được
+    help = "Chạy định kỳ các job dọn dẹp nền (hủy booking hết hạn, ...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Chạy một lượt rồi thoát"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=getattr(settings, "SWEEPER_INTERVAL_SECONDS", 30),
+            help="Số giây giữa hai lượt chạy",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "BOOKING_EXPIRY_BATCH_SIZE", 500),
+            help="Số booking tối đa mỗi transaction",
+        )
+
+    def get_jobs(self, options):
+        """Danh sách (tên job, hàm chạy job trả về số bản ghi đã xử lý)"""
+        return [
+            (
+                "expired_bookings",
+                lambda: expiry.sweep_expired_bookings(options["batch_size"]),
+            ),
+            ("showtime_statuses", scheduling.advance_statuses),
+            (
+                "expired_idempotency_keys",
+                lambda: idempotency.purge_expired_keys(options["batch_size"]),
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        jobs = self.get_jobs(options)
+
+        while True:
+            close_old_connections()
+            with advisory_lock(LEADER_LOCK, wait=False) as is_leader:
+                if is_leader:
+                    self.run_jobs(jobs)
+                elif options["verbosity"] > 1:
+                    self.stdout.write("Sweeper khác đang chạy, bỏ qua lượt này")
+
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+    def run_jobs(self, jobs):
+        for name, job in jobs:
+            started = time.monotonic()
+            try:
+                count = job()
+            except Exception as e:
+                self.stderr.write(f"[{timezone.now():%H:%M:%S}] {name}: lỗi {e}")
+                continue
+
+            elapsed_ms = (time.monotonic() - started) * 1000
+            if count:
+                self.stdout.write(
+                    f"[{timezone.now():%H:%M:%S}] {name}: {count} bản ghi ({elapsed_ms:.0f} ms)"
+                )
@@ -0,0 +1,48 @@
+from rest_framework import status
+from rest_framework.response import Response
+from services import idempotency
+
+
+class IdempotentCreateMixin:
+    """create() hỗ trợ header Idempotency-Key: gửi lại cùng key trả về
+    response đã lưu thay vì tạo bản ghi mới"""
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key or not request.user.is_authenticated:
+            return super().create(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"error": "Idempotency-Key tối đa 255 ký tự"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = idempotency.fingerprint(request)
+        record, created = idempotency.claim(request.user, key, request_hash)
+
+        if not created:
+            if record.request_hash != request_hash:
+                return Response(
+                    {"error": "Idempotency-Key đã được dùng cho một request khác"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record.response_status is None:
+                return Response(
+                    {"error": "Request với Idempotency-Key này đang được xử lý"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            response = Response(record.response_body, status=record.response_status)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except Exception:
+            idempotency.release(record)
+            raise
+
+        if response.status_code >= 500:
+            idempotency.release(record)
+        else:
+            idempotency.complete(record, response)
+        return response
@@ -5,9 +5,12 @@ from .movie_genre import MovieGenre
 from .auditorium import Auditorium
 from .seat import Seat
 from .showtime import Showtime
+from .showtime_inventory import ShowtimeInventory
+from .showtime_queue import ShowtimeQueue
 from .booking import Booking
 from .ticket import Ticket
 from .payment import Payment
+from .idempotency_key import IdempotencyKey
 
 __all__ = [
     "User",
@@ -17,7 +20,10 @@ __all__ = [
     "Auditorium",
     "Seat",
     "Showtime",
+    "ShowtimeInventory",
+    "ShowtimeQueue",
     "Booking",
     "Ticket",
     "Payment",
+    "IdempotencyKey",
 ]
\ No newline at end of file
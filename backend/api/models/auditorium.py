@@ -1,6 +1,25 @@
 from django.db import models
+from django.db.models import Count, Q
 import uuid
 
+
+class AuditoriumQuerySet(models.QuerySet):
+    def with_seat_counts(self):
+        """Annotate tổng số ghế và số ghế theo từng loại (COUNT có điều kiện,
+        một truy vấn cho cả danh sách)"""
+        from .seat import Seat
+
+        return self.annotate(
+            total_seats_count=Count("seats"),
+            **{
+                f"{seat_type}_seat_count": Count(
+                    "seats", filter=Q(seats__seat_type=seat_type)
+                )
+                for seat_type, _ in Seat.SEAT_TYPE_CHOICES
+            },
+        )
+
+
 class Auditorium(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=60, unique=True)
@@ -8,5 +27,11 @@ class Auditorium(models.Model):
     vip_row_count = models.PositiveIntegerField(default=0)
     couple_row_count = models.PositiveIntegerField(default=0)
     seats_per_row = models.PositiveIntegerField(default=0)
+    # Sơ đồ ghế dạng lưới (xem services.seat_layouts); null = sinh từ số hàng
+    layout = models.JSONField(null=True, blank=True)
+    # Tăng mỗi khi sơ đồ ghế thay đổi để làm mới cache sơ đồ ghế
+    layout_version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AuditoriumQuerySet.as_manager()
\ No newline at end of file
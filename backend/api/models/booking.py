@@ -57,30 +57,26 @@ class Booking(models.Model):
     def auto_cancel_if_expired(self):
         """Tự động hủy nếu hết hạn"""
         if self.is_expired() and self.status == "pending":
-            self.status = "canceled"
-            self.save()
+            from django.db import transaction
+            from services import inventory
 
-            # Hủy tất cả tickets của booking này
-            self.tickets.update(status="canceled")
+            with transaction.atomic():
+                self.status = "canceled"
+                self.save()
+
+                # Hủy tất cả tickets của booking này
+                inventory.transition_tickets(
+                    self.tickets.all(), "canceled", "expiry"
+                )
             return True
         return False
 
     @classmethod
     def cleanup_expired_bookings(cls):
         """Class method để cleanup tất cả booking hết hạn"""
-        from django.utils import timezone
-
-        now = timezone.now()
-        expired_bookings = cls.objects.filter(status="pending", expires_at__lt=now)
-
-        canceled_count = 0
-        for booking in expired_bookings:
-            booking.status = "canceled"
-            booking.save()
-            booking.tickets.update(status="canceled")
-            canceled_count += 1
+        from services.expiry import sweep_expired_bookings
 
-        return canceled_count
+        return sweep_expired_bookings()
 
     @property
     def booking_time(self):
@@ -0,0 +1,32 @@
+from django.db import models
+import uuid
+
+
+class IdempotencyKey(models.Model):
+    """Kết quả đã lưu của một request POST có header Idempotency-Key"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        "api.User", on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    # sha256 của method + path + body, để phát hiện key bị dùng lại cho request khác
+    request_hash = models.CharField(max_length=64)
+    # Chưa có response nghĩa là request đầu tiên vẫn đang xử lý
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="uniq_idempotency_key_per_user"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
@@ -1,6 +1,32 @@
 from django.db import models
+from django.db.models import Prefetch
+import re
+import unicodedata
 import uuid
 
+
+def normalize_search_text(text):
+    """Chữ thường, bỏ dấu tiếng Việt (kể cả đ -> d), chỉ giữ chữ và số"""
+    text = unicodedata.normalize("NFD", (text or "").replace("đ", "d").replace("Đ", "D"))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+class MovieQuerySet(models.QuerySet):
+    def with_genre_links(self):
+        """Prefetch (movie_id, genre_id) của bảng liên kết vào movie.genre_links;
+        tên thể loại lấy từ cache services.genres"""
+        from .movie_genre import MovieGenre
+
+        return self.prefetch_related(
+            Prefetch(
+                "moviegenre_set",
+                queryset=MovieGenre.objects.only("movie_id", "genre_id").order_by(),
+                to_attr="genre_links",
+            )
+        )
+
+
 class Movie(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200)
@@ -8,4 +34,25 @@ class Movie(models.Model):
     rating = models.CharField(max_length=10, blank=True, null=True)
     release_date = models.DateField(blank=True, null=True)
     description = models.TextField(blank=True)
-    poster_url = models.TextField(blank=True)
\ No newline at end of file
+    poster_url = models.TextField(blank=True)
+    # Tiêu đề + mô tả đã chuẩn hóa để tìm kiếm không dấu (xem
+    # services.movie_search), cập nhật trong save()
+    search_text = models.TextField(blank=True, default="", editable=False)
+    genres = models.ManyToManyField(
+        "api.Genre", through="api.MovieGenre", related_name="movies", blank=True
+    )
+
+    objects = MovieQuerySet.as_manager()
+
+    def build_search_text(self):
+        # Dòng đầu là tiêu đề để ưu tiên kết quả khớp đầu tiêu đề
+        return normalize_search_text(self.title) + "\n" + normalize_search_text(
+            self.description
+        )
+
+    def save(self, *args, **kwargs):
+        self.search_text = self.build_search_text()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"title", "description"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "search_text"}
+        super().save(*args, **kwargs)
@@ -70,16 +70,20 @@ class Payment(models.Model):
         if not can_refund:
             return False, message
 
-        # Cập nhật payment status
-        self.status = "refunded"
-        self.save()
+        from django.db import transaction
+        from services import inventory
 
-        # Cập nhật booking status
-        self.booking.status = "canceled"
-        self.booking.save()
+        with transaction.atomic():
+            # Cập nhật payment status
+            self.status = "refunded"
+            self.save()
 
-        # Cập nhật tickets
-        self.booking.tickets.update(status="refunded")
+            # Cập nhật booking status
+            self.booking.status = "canceled"
+            self.booking.save()
+
+            # Cập nhật tickets
+            inventory.transition_tickets(self.booking.tickets.all(), "refunded")
 
         return True, "Hoàn tiền thành công"
 
@@ -13,22 +13,27 @@ class Seat(models.Model):
     STANDARD = "standard"
     VIP = "vip"
     COUPLE = "couple"
+    ACCESSIBLE = "accessible"
 
     SEAT_TYPE_CHOICES = [
         (STANDARD, "Standard"),
         (VIP, "VIP"),
         (COUPLE, "Couple"),
+        (ACCESSIBLE, "Accessible"),
     ]
 
     PRICE_MULTIPLIER = {
         STANDARD: 1.0,
         VIP: 1.5,
         COUPLE: 3.0,
+        ACCESSIBLE: 1.0,
     }
 
     seat_type = models.CharField(
         max_length=10, choices=SEAT_TYPE_CHOICES, default=STANDARD
     )
+    # Ghế đôi: hai ghế cùng hàng, cùng pair_group là một cặp
+    pair_group = models.PositiveSmallIntegerField(null=True, blank=True)
 
     class Meta:
         unique_together = ("auditorium", "row_label", "seat_number")
@@ -1,8 +1,113 @@
 from django.db import models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
 import uuid
 
 
+class ShowtimeQuerySet(models.QuerySet):
+    def with_availability(self):
+        """Annotate tổng số ghế và số ghế đã đặt trong cùng một truy vấn.
+
+        Đọc từ ShowtimeInventory, chỉ đếm lại bằng subquery khi suất chiếu
+        chưa có bộ đếm. Vé giữ chỗ đã quá hạn (chưa được sweeper hủy) được
+        trừ ra, và chỉ đếm khi suất chiếu đang có vé giữ chỗ.
+        """
+        from .seat import Seat
+        from .ticket import Ticket
+
+        seat_count = (
+            Seat.objects.filter(auditorium=OuterRef("auditorium"))
+            .order_by()
+            .values("auditorium")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        booked_count = (
+            Ticket.objects.filter(showtime=OuterRef("pk"))
+            .active()
+            .order_by()
+            .values("showtime")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        expired_hold_count = (
+            Ticket.objects.filter(showtime=OuterRef("pk"))
+            .expired_holds()
+            .order_by()
+            .values("showtime")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+
+        return self.annotate(
+            total_seats_count=Coalesce(
+                F("inventory__total_seats"),
+                Subquery(seat_count),
+                0,
+                output_field=models.IntegerField(),
+            ),
+            booked_seats_count=Coalesce(
+                F("inventory__reserved_count")
+                + F("inventory__paid_count")
+                + F("inventory__checked_in_count")
+                - Case(
+                    When(
+                        inventory__reserved_count__gt=0,
+                        then=Coalesce(Subquery(expired_hold_count), 0),
+                    ),
+                    default=0,
+                ),
+                Subquery(booked_count),
+                0,
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    def with_occupancy(self):
+        """with_availability() + occupancy_rate (%) tính trong SQL"""
+        return self.with_availability().annotate(
+            occupancy_rate=Case(
+                When(total_seats_count=0, then=Value(0.0)),
+                default=Cast(F("booked_seats_count") * 100, models.FloatField())
+                / F("total_seats_count"),
+                output_field=models.FloatField(),
+            )
+        )
+
+    @staticmethod
+    def bucket_filters():
+        """Điều kiện lọc theo cột status cho từng nhóm của dashboard (cùng
+        cách phân nhóm với danh sách công khai và job showtime_statuses)"""
+        return {
+            "showing": Q(status=Showtime.SHOWING),
+            "upcoming": Q(status=Showtime.SCHEDULED),
+            "finished": Q(status=Showtime.FINISHED),
+        }
+
+    def bucket_counts(self):
+        """Số suất chiếu mỗi nhóm trong một câu aggregate (COUNT có điều kiện)"""
+        return self.aggregate(
+            total=Count("id"),
+            **{
+                name: Count("id", filter=condition)
+                for name, condition in self.bucket_filters().items()
+            },
+        )
+
+
 class Showtime(models.Model):
+    # Vòng đời: scheduled -> showing -> finished, được job
+    # showtime_statuses của run_sweeper cập nhật theo lô
+    SCHEDULED = "scheduled"
+    SHOWING = "showing"
+    FINISHED = "finished"
+
+    STATUS_CHOICES = [
+        (SCHEDULED, "Scheduled"),
+        (SHOWING, "Showing"),
+        (FINISHED, "Finished"),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     movie = models.ForeignKey(
         "api.Movie", on_delete=models.RESTRICT, related_name="showtimes"
@@ -13,13 +118,22 @@ class Showtime(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     base_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    status = models.CharField(max_length=20, default="scheduled")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=SCHEDULED)
+    # Phòng chờ: khi bật, chỉ người đã tới lượt mới được đặt vé
+    queue_enabled = models.BooleanField(default=False)
+    queue_admit_rate = models.PositiveIntegerField(default=60)  # người/phút
+
+    objects = ShowtimeQuerySet.as_manager()
 
     class Meta:
+        # Chống trùng lịch trong cùng phòng: exclusion constraint
+        # excl_showtime_auditorium_overlap (tstzrange, btree_gist) khai báo
+        # trong schema.sql
         unique_together = ("auditorium", "start_time")
         indexes = [
             models.Index(fields=["movie"]),
             models.Index(fields=["auditorium", "start_time"]),
+            models.Index(fields=["status", "start_time"]),
         ]
 
     def can_book(self):
@@ -29,7 +143,7 @@ class Showtime(models.Model):
 
         now = timezone.now()
 
-        if self.status != "scheduled":
+        if self.status != self.SCHEDULED:
             return False, "Suất chiếu không khả dụng"
 
         if now >= self.start_time:
@@ -42,53 +156,73 @@ class Showtime(models.Model):
 
         return True, "OK"
 
-    def get_available_seats_count(self):
-        """Đếm số ghế còn trống"""
+    def get_inventory(self):
+        """Bộ đếm ghế của suất chiếu (None nếu chưa được tạo)"""
+        from .showtime_inventory import ShowtimeInventory
+
+        try:
+            return self.inventory
+        except ShowtimeInventory.DoesNotExist:
+            return None
+
+    def get_total_seats_count(self):
+        """Tổng số ghế, ưu tiên giá trị đã annotate bởi with_availability()"""
+        total_seats = getattr(self, "total_seats_count", None)
+        if total_seats is None:
+            inventory = self.get_inventory()
+            if inventory is not None:
+                total_seats = inventory.total_seats
+            else:
+                total_seats = self.auditorium.seats.count()
+        return total_seats
+
+    def get_booked_seats_count(self):
+        """Số ghế đã đặt, ưu tiên giá trị đã annotate bởi with_availability()"""
         from .ticket import Ticket
 
-        total_seats = self.auditorium.seats.count()
-        booked_seats = Ticket.objects.filter(
-            showtime=self, status__in=["reserved", "paid", "checked_in"]
-        ).count()
+        booked_seats = getattr(self, "booked_seats_count", None)
+        if booked_seats is None:
+            inventory = self.get_inventory()
+            if inventory is not None:
+                booked_seats = inventory.booked_count
+                if inventory.reserved_count:
+                    booked_seats -= (
+                        Ticket.objects.filter(showtime=self).expired_holds().count()
+                    )
+            else:
+                booked_seats = Ticket.objects.filter(showtime=self).active().count()
+        return booked_seats
 
-        return total_seats - booked_seats
+    def get_available_seats_count(self):
+        """Đếm số ghế còn trống"""
+        return self.get_total_seats_count() - self.get_booked_seats_count()
 
     def get_occupancy_rate(self):
         """Tính tỷ lệ lấp đầy"""
-        total_seats = self.auditorium.seats.count()
+        total_seats = self.get_total_seats_count()
         if total_seats == 0:
             return 0
 
-        available_seats = self.get_available_seats_count()
-        booked_seats = total_seats - available_seats
+        booked_seats = self.get_booked_seats_count()
 
         return round((booked_seats / total_seats) * 100, 1)
 
     def get_realtime_status(self):
-        """Lấy trạng thái theo thời gian thực"""
+        """Trạng thái hiển thị, dựa trên cột status đã được sweeper cập nhật"""
         from django.utils import timezone
 
-        now = timezone.now()
-
-        # Đã kết thúc
-        if now >= self.end_time:
+        if self.status == self.FINISHED:
             return {"status": "finished", "label": "Đã kết thúc", "color": "gray"}
 
-        # Đang chiếu
-        elif now >= self.start_time and now < self.end_time:
+        if self.status == self.SHOWING:
             return {"status": "showing", "label": "Đang chiếu", "color": "green"}
 
-        # Sắp chiếu
-        else:
-            from datetime import timedelta
+        time_until_start = (self.start_time - timezone.now()).total_seconds() / 60
 
-            time_until_start = (self.start_time - now).total_seconds() / 60  # phút
-
-            if time_until_start <= 30:
-                return {
-                    "status": "starting_soon",
-                    "label": f"Sắp chiếu ({int(time_until_start)} phút nữa)",
-                    "color": "orange",
-                }
-            else:
-                return {"status": "scheduled", "label": "Chưa chiếu", "color": "blue"}
+        if time_until_start <= 30:
+            return {
+                "status": "starting_soon",
+                "label": f"Sắp chiếu ({max(0, int(time_until_start))} phút nữa)",
+                "color": "orange",
+            }
+        return {"status": "scheduled", "label": "Chưa chiếu", "color": "blue"}
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class ShowtimeInventory(models.Model):
+    """Bộ đếm ghế đã tính sẵn cho mỗi suất chiếu"""
+
+    showtime = models.OneToOneField(
+        "api.Showtime",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="inventory",
+    )
+    total_seats = models.PositiveIntegerField(default=0)
+    reserved_count = models.PositiveIntegerField(default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    checked_in_count = models.PositiveIntegerField(default=0)
+    # Tăng mỗi lần có ticket được tạo/đổi trạng thái (hủy, hết hạn, hoàn tiền...)
+    seat_version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def booked_count(self):
+        """Số ghế đang bị chiếm (reserved + paid + checked_in)"""
+        return self.reserved_count + self.paid_count + self.checked_in_count
+
+    @property
+    def available_count(self):
+        return max(0, self.total_seats - self.booked_count)
+
+    def __str__(self):
+        return f"{self.showtime_id}: {self.booked_count}/{self.total_seats}"
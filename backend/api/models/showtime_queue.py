@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class ShowtimeQueue(models.Model):
+    """Trạng thái hàng chờ của suất chiếu (DatabaseQueueStore)"""
+
+    showtime = models.OneToOneField(
+        "api.Showtime",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="queue",
+    )
+    # Số token đã phát; vị trí 1..admitted_count đã được vào đặt vé
+    issued_count = models.PositiveBigIntegerField(default=0)
+    admitted_count = models.PositiveBigIntegerField(default=0)
+    # Mốc tính các lượt mở tiếp theo
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.showtime_id}: {self.admitted_count}/{self.issued_count}"
@@ -1,6 +1,29 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 
+# Các trạng thái đang chiếm ghế (xem thêm TicketQuerySet.active). Khai báo ở
+# mức module vì Meta của Ticket (unique index) không đọc được thuộc tính lớp
+ACTIVE_STATUSES = ["reserved", "paid", "checked_in"]
+
+
+class TicketQuerySet(models.QuerySet):
+    def expired_holds(self, now=None):
+        """Vé giữ chỗ của booking pending đã quá hạn nhưng chưa được sweeper hủy"""
+        return self.filter(
+            status=Ticket.RESERVED,
+            booking__status="pending",
+            booking__expires_at__lt=now or timezone.now(),
+        )
+
+    def active(self, now=None):
+        """Vé đang chiếm ghế; vé giữ chỗ đã quá hạn coi như đã nhả (không cần ghi)"""
+        return self.filter(status__in=Ticket.ACTIVE_STATUSES).exclude(
+            status=Ticket.RESERVED,
+            booking__status="pending",
+            booking__expires_at__lt=now or timezone.now(),
+        )
+
 
 class Ticket(models.Model):
     RESERVED = "reserved"
@@ -16,6 +39,9 @@ class Ticket(models.Model):
         (CANCELED, "Canceled"),  # ← THÊM
         (REFUNDED, "Refunded"),  # ← THÊM
     ]
+
+    ACTIVE_STATUSES = ACTIVE_STATUSES
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     booking = models.ForeignKey(
         "api.Booking", on_delete=models.CASCADE, related_name="tickets"
@@ -27,14 +53,28 @@ class Ticket(models.Model):
         "api.Seat", on_delete=models.RESTRICT, related_name="tickets"
     )
     price = models.DecimalField(max_digits=12, decimal_places=2)
-    qr_code = models.CharField(max_length=64, blank=True, null=True)
+    # Mã QR đã ký (services.ticket_codes), tạo khi vé được thanh toán
+    qr_code = models.CharField(max_length=128, blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RESERVED)
     booked_at = models.DateTimeField(auto_now_add=True)
+    # seat_version của suất chiếu tại lần thay đổi trạng thái gần nhất
+    seat_version = models.PositiveBigIntegerField(default=0)
+
+    objects = TicketQuerySet.as_manager()
 
     class Meta:
-        unique_together = ("showtime", "seat")
+        constraints = [
+            # Mỗi ghế chỉ có một vé còn hiệu lực mỗi suất chiếu; vé đã hủy /
+            # hoàn tiền được giữ lại làm lịch sử và ghế có thể bán lại
+            models.UniqueConstraint(
+                fields=["showtime", "seat"],
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name="uniq_active_ticket_per_seat",
+            ),
+        ]
         indexes = [
             models.Index(fields=["showtime"]),
+            models.Index(fields=["showtime", "seat_version"]),
         ]
 
     def save(self, *args, **kwargs):
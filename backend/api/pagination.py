@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ShowtimeCursorPagination(CursorPagination):
+    """Phân trang theo con trỏ start_time: không cần COUNT và không chậm dần
+    ở các trang sau như phân trang theo offset"""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("start_time", "id")
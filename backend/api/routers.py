@@ -6,6 +6,7 @@ from api.views.auditorium import AuditoriumViewSet, SeatViewSet
 from api.views.showtime import ShowtimeViewSet
 from api.views.booking import BookingViewSet, TicketViewSet
 from api.views.payment import PaymentViewSet
+from api.views.seat_events import showtime_seat_stream
 
 # Router cho API endpoints
 router = DefaultRouter()
@@ -20,6 +21,8 @@ router.register(r'ticket', TicketViewSet)
 router.register(r'payments', PaymentViewSet)
 
 urlpatterns = [
+    # Luồng sự kiện ghế (SSE, cần chạy ASGI)
+    path('api/showtime/<uuid:pk>/seats/stream/', showtime_seat_stream, name='showtime-seat-stream'),
     # API endpoints
     path('api/', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from django.db import transaction
 from ..models import Auditorium, Seat
+from services import seat_layouts, seat_map
 
 class SeatSerializer(serializers.ModelSerializer):
     price_info = serializers.SerializerMethodField()
@@ -24,91 +26,97 @@ class AuditoriumSerializer(serializers.ModelSerializer):
                 'couple_row_count', 'seats_per_row', 'total_seats', 'seat_summary']
     
     def get_total_seats(self, obj):
-        return obj.seats.count()
+        # Ưu tiên giá trị đã annotate bởi with_seat_counts()
+        total_seats = getattr(obj, 'total_seats_count', None)
+        if total_seats is None:
+            return len(seat_map.get_layout(obj))
+        return total_seats
     
     def get_seat_summary(self, obj):
-        seats = obj.seats.all()
+        if not hasattr(obj, 'total_seats_count'):
+            return seat_map.get_layout(obj).seat_summary()
         return {
-            'standard': seats.filter(seat_type=Seat.STANDARD).count(),
-            'vip': seats.filter(seat_type=Seat.VIP).count(),
-            'couple': seats.filter(seat_type=Seat.COUPLE).count(),
+            seat_type: getattr(obj, f'{seat_type}_seat_count')
+            for seat_type, _ in Seat.SEAT_TYPE_CHOICES
         }
 
 class AuditoriumDetailSerializer(AuditoriumSerializer):
-    seats = SeatSerializer(many=True, read_only=True)
+    # Sơ đồ ghế dạng cột lấy từ SeatLayout đã cache (xem SeatLayout.columns)
+    seats = serializers.SerializerMethodField()
     
     class Meta(AuditoriumSerializer.Meta):
-        fields = AuditoriumSerializer.Meta.fields + ['seats']
+        fields = AuditoriumSerializer.Meta.fields + ['layout', 'seats']
+    
+    def get_seats(self, obj):
+        return seat_map.get_layout(obj).columns()
 
 class AuditoriumCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Auditorium
         fields = ['name', 'standard_row_count', 'vip_row_count',
-                'couple_row_count', 'seats_per_row']
+                'couple_row_count', 'seats_per_row', 'layout']
     
     def validate(self, data):
-        total_rows = data['standard_row_count'] + data['vip_row_count'] + data['couple_row_count']
-        if total_rows > 12:  # Giới hạn 12 hàng (A-L)
-            raise serializers.ValidationError("Tổng số hàng không được vượt quá 12")
+        if data.get('layout'):
+            try:
+                specs = seat_layouts.parse(data['layout'])
+            except seat_layouts.LayoutError as e:
+                raise serializers.ValidationError({'layout': str(e)})
+            # Số hàng/ghế mỗi hàng suy ra từ sơ đồ
+            data.update(seat_layouts.summarize(specs))
+            return data
+        
+        # Khi sửa một phần, trường không gửi lên lấy theo phòng hiện tại
+        counts = {
+            field: data.get(field, getattr(self.instance, field, 0))
+            for field in ('standard_row_count', 'vip_row_count',
+                          'couple_row_count', 'seats_per_row')
+        }
+        total_rows = (counts['standard_row_count'] + counts['vip_row_count']
+                      + counts['couple_row_count'])
+        if total_rows > seat_layouts.MAX_ROWS:
+            raise serializers.ValidationError(
+                f"Tổng số hàng không được vượt quá {seat_layouts.MAX_ROWS}")
         
-        if data['seats_per_row'] > 20:  # Giới hạn 20 ghế mỗi hàng
-            raise serializers.ValidationError("Số ghế mỗi hàng không được vượt quá 20")
+        if counts['seats_per_row'] > seat_layouts.MAX_COLUMNS:
+            raise serializers.ValidationError(
+                f"Số ghế mỗi hàng không được vượt quá {seat_layouts.MAX_COLUMNS}")
+        
+        # Kiểm tra cả sơ đồ suy ra (tổng số ghế, hàng không có ghế, ...);
+        # phòng chưa có hàng nào thì chưa tạo ghế
+        if total_rows:
+            try:
+                seat_layouts.parse(seat_layouts.from_counts(**counts))
+            except seat_layouts.LayoutError as e:
+                raise serializers.ValidationError(str(e))
         
         return data
     
     def create(self, validated_data):
-        auditorium = Auditorium.objects.create(**validated_data)
-        
-        # Tự động tạo ghế
-        self.create_seats(auditorium)
+        try:
+            with transaction.atomic():
+                auditorium = Auditorium.objects.create(**validated_data)
+                
+                # Tự động tạo ghế
+                self.create_seats(auditorium)
+        except seat_layouts.LayoutError as e:
+            raise serializers.ValidationError({'layout': str(e)})
+        return auditorium
+    
+    def update(self, instance, validated_data):
+        # Đổi sơ đồ -> đồng bộ ghế ngay (giữ id các ghế không đổi vị trí)
+        try:
+            with transaction.atomic():
+                auditorium = super().update(instance, validated_data)
+                if validated_data.get('layout'):
+                    self.create_seats(auditorium)
+        except seat_layouts.LayoutError as e:
+            raise serializers.ValidationError({'layout': str(e)})
         return auditorium
     
     def create_seats(self, auditorium):
-        """Tự động tạo ghế theo cấu hình"""
-        row_labels = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L']
-        current_row = 0
-        
-        # Tạo ghế Standard
-        for i in range(auditorium.standard_row_count):
-            row_label = row_labels[current_row]
-            for seat_num in range(1, auditorium.seats_per_row + 1):
-                Seat.objects.create(
-                    auditorium=auditorium,
-                    row_label=row_label,
-                    seat_number=seat_num,
-                    seat_type=Seat.STANDARD
-                )
-            current_row += 1
-        
-        # Tạo ghế VIP
-        for i in range(auditorium.vip_row_count):
-            row_label = row_labels[current_row]
-            for seat_num in range(1, auditorium.seats_per_row + 1):
-                Seat.objects.create(
-                    auditorium=auditorium,
-                    row_label=row_label,
-                    seat_number=seat_num,
-                    seat_type=Seat.VIP
-                )
-            current_row += 1
-        
-        # Tạo ghế Couple (2 ghế 1 cặp)
-        for i in range(auditorium.couple_row_count):
-            row_label = row_labels[current_row]
-            for seat_num in range(1, auditorium.seats_per_row + 1, 2):
-                # Tạo ghế couple theo cặp
-                Seat.objects.create(
-                    auditorium=auditorium,
-                    row_label=row_label,
-                    seat_number=seat_num,
-                    seat_type=Seat.COUPLE
-                )
-                # Ghế couple số 2 trong cặp
-                if seat_num + 1 <= auditorium.seats_per_row:
-                    Seat.objects.create(
-                        auditorium=auditorium,
-                        row_label=row_label,
-                        seat_number=seat_num + 1,
-                        seat_type=Seat.COUPLE
-                    )
-            current_row += 1
\ No newline at end of file
+        """Tạo/đồng bộ ghế theo sơ đồ của phòng (một lần bulk_create)"""
+        definition = seat_layouts.definition_for(auditorium)
+        if not definition['rows']:
+            return None
+        return seat_layouts.apply_layout(auditorium, seat_layouts.parse(definition))
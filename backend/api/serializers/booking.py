@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
-from django.db import transaction
 from datetime import timedelta
 from ..models import Booking, Ticket, Showtime, Seat, User
+from services import holds, waiting_room
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -18,6 +19,7 @@ class TicketSerializer(serializers.ModelSerializer):
             "seat_info",
             "price",
             "status",
+            "qr_code",
             "booked_at",
             "showtime_info",
             "booking_info",
@@ -133,60 +135,26 @@ class BookingCreateSerializer(serializers.ModelSerializer):
                 "Một số ghế không tồn tại hoặc không thuộc phòng chiếu này"
             )
 
-        # Kiểm tra ghế đã được đặt chưa
-        existing_tickets = Ticket.objects.filter(
-            showtime=showtime,
-            seat__in=seats,
-            status__in=["reserved", "paid", "checked_in"],
-        )
-
-        if existing_tickets.exists():
-            booked_seats = existing_tickets.values_list(
-                "seat__row_label", "seat__seat_number"
-            )
-            seat_labels = [f"{row}{num}" for row, num in booked_seats]
-            raise serializers.ValidationError(
-                f"Ghế đã được đặt: {', '.join(seat_labels)}"
-            )
+        # Suất chiếu đang dùng phòng chờ: chỉ token đã tới lượt được đặt vé
+        if showtime.queue_enabled:
+            request = self.context["request"]
+            token = request.headers.get("X-Queue-Token")
+            if not waiting_room.is_admitted(showtime, request.user, token):
+                raise PermissionDenied(
+                    "Suất chiếu đang dùng phòng chờ, vui lòng đợi tới lượt"
+                )
 
+        # Ghế đã bị chiếm hay chưa được kiểm tra trong create, cùng
+        # transaction và khóa với bước tạo vé (services.holds)
         return data
 
     def create(self, validated_data):
-        seat_ids = validated_data.pop("seat_ids")
-        showtime = validated_data["showtime"]
-        user = self.context["request"].user
-
-        with transaction.atomic():
-            # Sửa status từ 'reserved' → 'pending'
-            booking = Booking.objects.create(
-                user=user, showtime=showtime, status="pending"  # ← SỬA TỪ 'reserved'
-            )
-
-            # Tạo tickets cho từng ghế
-            total_amount = 0
-            seats = Seat.objects.filter(id__in=seat_ids)
-
-            from decimal import Decimal
-            for seat in seats:
-                # Tính giá vé theo loại ghế
-                multiplier = seat.PRICE_MULTIPLIER.get(seat.seat_type, 1.0)
-                price = showtime.base_price * Decimal(str(multiplier))
-
-                ticket = Ticket.objects.create(
-                    booking=booking,
-                    showtime=showtime,
-                    seat=seat,
-                    price=price,
-                    status="reserved",  # ← Ticket vẫn dùng 'reserved' (đúng)
-                )
-
-                total_amount += price
-
-            # Cập nhật tổng tiền
-            booking.total_amount = total_amount
-            booking.save()
-
-            return booking
+        """Giữ chỗ; raise holds.SeatsUnavailable nếu có ghế đã bị chiếm"""
+        return holds.hold_seats(
+            self.context["request"].user,
+            validated_data["showtime"],
+            validated_data["seat_ids"],
+        )
 
 
 class BookingDetailSerializer(BookingSerializer):
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from ..models import Movie, Genre, MovieGenre
+from services import genres
 
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,8 +16,11 @@ class MovieSerializer(serializers.ModelSerializer):
                 'description', 'poster_url', 'genres']
     
     def get_genres(self, obj):
-        movie_genres = MovieGenre.objects.filter(movie=obj).select_related('genre')
-        return [mg.genre.name for mg in movie_genres]
+        # Đã prefetch bởi with_genre_links(): tên lấy từ cache thể loại
+        links = getattr(obj, 'genre_links', None)
+        if links is None:
+            return list(obj.genres.order_by('name').values_list('name', flat=True))
+        return genres.names_for([link.genre_id for link in links])
 
 class MovieCreateSerializer(serializers.ModelSerializer):
     genre_ids = serializers.ListField(
@@ -30,16 +34,33 @@ class MovieCreateSerializer(serializers.ModelSerializer):
         fields = ['title', 'duration_min', 'rating', 'release_date', 
                 'description', 'poster_url', 'genre_ids']
     
+    def validate_genre_ids(self, value):
+        # Kiểm tra tất cả genre id trong một truy vấn
+        value = list(dict.fromkeys(value))
+        existing = set(Genre.objects.filter(id__in=value).values_list('id', flat=True))
+        missing = [str(genre_id) for genre_id in value if genre_id not in existing]
+        if missing:
+            raise serializers.ValidationError(
+                f"Thể loại không tồn tại: {', '.join(missing)}")
+        return value
+    
     def create(self, validated_data):
         genre_ids = validated_data.pop('genre_ids', [])
         movie = Movie.objects.create(**validated_data)
         
-        # Thêm genres cho movie
-        for genre_id in genre_ids:
-            try:
-                genre = Genre.objects.get(id=genre_id)
-                MovieGenre.objects.create(movie=movie, genre=genre)
-            except Genre.DoesNotExist:
-                continue
+        # Thêm genres cho movie (một lần bulk_create)
+        MovieGenre.objects.bulk_create(
+            MovieGenre(movie=movie, genre_id=genre_id) for genre_id in genre_ids
+        )
+        
+        return movie
+    
+    def update(self, instance, validated_data):
+        genre_ids = validated_data.pop('genre_ids', None)
+        movie = super().update(instance, validated_data)
+        
+        # Chỉ thêm/xóa các liên kết thay đổi
+        if genre_ids is not None:
+            movie.genres.set(genre_ids)
         
-        return movie
\ No newline at end of file
+        return movie
@@ -2,7 +2,8 @@ from rest_framework import serializers
 from django.utils import timezone
 from django.db import transaction
 from decimal import Decimal
-from ..models import Payment, Booking
+from ..models import Payment, Booking, Ticket
+from services import inventory, ticket_codes
 
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -52,11 +53,8 @@ class PaymentCreateSerializer(serializers.ModelSerializer):
                 "Booking không ở trạng thái có thể thanh toán"
             )
 
-        # Kiểm tra booking chưa quá hạn (10 phút)
-        from datetime import timedelta
-
-        expire_time = value.booking_time + timedelta(minutes=10)
-        if timezone.now() > expire_time:
+        # Kiểm tra booking chưa quá hạn (kể cả khi sweeper chưa kịp hủy)
+        if value.is_expired():
             raise serializers.ValidationError("Booking đã quá hạn thanh toán")
 
         # Kiểm tra chưa có payment nào cho booking này
@@ -70,6 +68,14 @@ class PaymentCreateSerializer(serializers.ModelSerializer):
         provider = validated_data["provider"]  # ← SỬA TỪ payment_method
 
         with transaction.atomic():
+            # Khóa booking rồi kiểm tra lại: sweeper có thể vừa hủy booking
+            # sau validate (sweeper bỏ qua booking đang bị khóa ở đây)
+            booking = Booking.objects.select_for_update().get(pk=booking.pk)
+            if booking.status != Booking.PENDING or booking.is_expired():
+                raise serializers.ValidationError(
+                    {"booking": "Booking đã quá hạn thanh toán"}
+                )
+
             payment = Payment.objects.create(
                 booking=booking,
                 amount=booking.total_amount,
@@ -88,7 +94,11 @@ class PaymentCreateSerializer(serializers.ModelSerializer):
             booking.status = "paid"
             booking.save()
 
-            booking.tickets.update(status="paid")
+            # Chỉ vé còn giữ chỗ; không hồi sinh vé đã bị hủy
+            inventory.transition_tickets(
+                booking.tickets.filter(status=Ticket.RESERVED), Ticket.PAID
+            )
+            ticket_codes.assign_codes(booking.tickets.filter(status=Ticket.PAID))
 
             return payment
 
@@ -161,7 +171,9 @@ class RefundSerializer(serializers.Serializer):
             payment.booking.status = "refunded"
             payment.booking.save()
 
-            payment.booking.tickets.update(status="refunded")
+            inventory.transition_tickets(
+                payment.booking.tickets.all(), Ticket.REFUNDED
+            )
 
             # Tạo refund record (có thể tạo model riêng nếu cần)
             # RefundRecord.objects.create(payment=payment, reason=reason)
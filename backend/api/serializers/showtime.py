@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from datetime import timedelta
-from ..models import Showtime, Movie, Auditorium, Ticket
+from datetime import time, timedelta
+from ..models import Showtime, Movie, Auditorium
+from services import inventory, scheduling, seat_map
 
 
 class ShowtimeSerializer(serializers.ModelSerializer):
@@ -36,28 +38,17 @@ class ShowtimeSerializer(serializers.ModelSerializer):
             "occupancy_rate",
             "booking_status",
             "realtime_status",  # ✅ THÊM field
+            "queue_enabled",
         ]
 
     def get_available_seats(self, obj):
-        from ..models import Ticket
-
-        total_seats = obj.auditorium.seats.count()
-        booked_seats = Ticket.objects.filter(
-            showtime=obj, status__in=["reserved", "paid", "checked_in"]
-        ).count()
-        return total_seats - booked_seats
+        return obj.get_available_seats_count()
 
     def get_total_seats(self, obj):
-        return obj.auditorium.seats.count()
+        return obj.get_total_seats_count()
 
     def get_occupancy_rate(self, obj):
-        from ..models import Ticket
-
-        total_seats = obj.auditorium.seats.count()
-        booked_seats = Ticket.objects.filter(
-            showtime=obj, status__in=["reserved", "paid", "checked_in"]
-        ).count()
-        return round((booked_seats / total_seats) * 100, 1) if total_seats > 0 else 0
+        return obj.get_occupancy_rate()
 
     def get_booking_status(self, obj):
         from django.utils import timezone
@@ -96,10 +87,8 @@ class ShowtimeCreateSerializer(serializers.ModelSerializer):
         auditorium = data["auditorium"]
         start_time = data["start_time"]
 
-        # Tính end_time dựa trên duration của movie
-        end_time = start_time + timedelta(
-            minutes=movie.duration_min + 30
-        )  # +30 phút dọn dẹp
+        # Tính end_time dựa trên duration của movie (+30 phút dọn dẹp)
+        end_time = scheduling.end_time_for(movie, start_time)
 
         # Kiểm tra trùng lịch trong cùng auditorium
         overlapping_showtimes = Showtime.objects.filter(
@@ -123,13 +112,187 @@ class ShowtimeCreateSerializer(serializers.ModelSerializer):
         start_time = validated_data["start_time"]
 
         # Tự động tính end_time
-        end_time = start_time + timedelta(minutes=movie.duration_min + 30)
-
-        showtime = Showtime.objects.create(**validated_data, end_time=end_time)
+        end_time = scheduling.end_time_for(movie, start_time)
+
+        # Suất chiếu khác tạo đồng thời có thể lọt qua validate: exclusion
+        # constraint trong DB chặn lại, báo lỗi như trùng lịch thay vì 500
+        try:
+            with transaction.atomic():
+                showtime = Showtime.objects.create(**validated_data, end_time=end_time)
+                inventory.ensure_inventory(showtime)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "Trùng lịch với suất chiếu khác vừa được tạo trong cùng phòng"
+            )
 
         return showtime
 
 
+class ShowtimeBulkItemSerializer(serializers.Serializer):
+    movie = serializers.UUIDField()
+    auditorium = serializers.UUIDField()
+    start_time = serializers.DateTimeField()
+    base_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=0, default=0
+    )
+
+
+class ShowtimeBulkCreateSerializer(serializers.Serializer):
+    """Tạo nhiều suất chiếu một lần: phim/phòng được đọc bằng một truy vấn
+    mỗi loại, trùng lịch kiểm tra trong bộ nhớ bằng IntervalIndex"""
+
+    showtimes = ShowtimeBulkItemSerializer(
+        many=True, allow_empty=False, max_length=scheduling.MAX_BATCH
+    )
+
+    def validate_showtimes(self, items):
+        movies = Movie.objects.in_bulk({item["movie"] for item in items})
+        auditoriums = Auditorium.objects.in_bulk({item["auditorium"] for item in items})
+        now = timezone.now()
+
+        errors = [{} for _ in items]
+        for item, error in zip(items, errors):
+            item["movie"] = movies.get(item["movie"])
+            item["auditorium"] = auditoriums.get(item["auditorium"])
+            if item["movie"] is None:
+                error["movie"] = ["Phim không tồn tại"]
+            if item["auditorium"] is None:
+                error["auditorium"] = ["Phòng chiếu không tồn tại"]
+            if item["start_time"] <= now:
+                error["start_time"] = ["Thời gian chiếu phải trong tương lai"]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        conflicts = scheduling.find_conflicts(items)
+        if conflicts:
+            for i, message in conflicts:
+                errors[i]["start_time"] = [message]
+            raise serializers.ValidationError(errors)
+        return items
+
+    def create(self, validated_data):
+        return scheduling.bulk_schedule(validated_data["showtimes"])
+
+
+class ScheduleMovieSerializer(serializers.Serializer):
+    movie = serializers.UUIDField()
+    screens_per_day = serializers.IntegerField(min_value=0, max_value=50)
+    base_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=0, required=False
+    )
+
+
+class ShowtimeGenerateSerializer(serializers.Serializer):
+    """Tham số xếp lịch tự động (xem scheduling.generate)"""
+
+    movies = ScheduleMovieSerializer(many=True, allow_empty=False)
+    # Bỏ trống: dùng tất cả phòng chiếu
+    auditoriums = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False
+    )
+    start_date = serializers.DateField()
+    days = serializers.IntegerField(min_value=1, max_value=14, default=7)
+    open_time = serializers.TimeField(default=time(9, 0))
+    close_time = serializers.TimeField(default=time(0, 0))  # 00:00 = nửa đêm
+    base_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=0, default=0
+    )
+    commit = serializers.BooleanField(default=False)
+
+    def validate_movies(self, value):
+        movies = Movie.objects.in_bulk({item["movie"] for item in value})
+        missing = [str(item["movie"]) for item in value if item["movie"] not in movies]
+        if missing:
+            raise serializers.ValidationError(
+                f"Phim không tồn tại: {', '.join(missing)}"
+            )
+        for item in value:
+            item["movie"] = movies[item["movie"]]
+        return value
+
+    def validate_auditoriums(self, value):
+        auditoriums = Auditorium.objects.in_bulk(value)
+        missing = [str(pk) for pk in value if pk not in auditoriums]
+        if missing:
+            raise serializers.ValidationError(
+                f"Phòng chiếu không tồn tại: {', '.join(missing)}"
+            )
+        return list(auditoriums.values())
+
+    def validate(self, data):
+        if "auditoriums" not in data:
+            data["auditoriums"] = list(Auditorium.objects.order_by("name"))
+        if not data["auditoriums"]:
+            raise serializers.ValidationError("Chưa có phòng chiếu nào")
+        return data
+
+    def generate(self):
+        data = self.validated_data
+        targets = [
+            scheduling.MovieTarget(
+                movie=item["movie"],
+                screens_per_day=item["screens_per_day"],
+                base_price=item.get("base_price", data["base_price"]),
+            )
+            for item in data["movies"]
+        ]
+        days = [
+            data["start_date"] + timedelta(days=offset) for offset in range(data["days"])
+        ]
+        return scheduling.generate(
+            targets, data["auditoriums"], days, data["open_time"], data["close_time"]
+        )
+
+
+class ShowtimeDashboardSerializer(serializers.ModelSerializer):
+    """Dòng dashboard admin: chỉ đọc các cột đã annotate bởi with_occupancy()"""
+
+    movie_title = serializers.CharField(source="movie.title", read_only=True)
+    auditorium_name = serializers.CharField(source="auditorium.name", read_only=True)
+    total_seats = serializers.IntegerField(source="total_seats_count", read_only=True)
+    booked_seats = serializers.IntegerField(
+        source="booked_seats_count", read_only=True
+    )
+    available_seats = serializers.SerializerMethodField()
+    occupancy_rate = serializers.SerializerMethodField()
+    realtime_status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Showtime
+        fields = [
+            "id",
+            "movie",
+            "movie_title",
+            "auditorium",
+            "auditorium_name",
+            "start_time",
+            "end_time",
+            "base_price",
+            "status",
+            "total_seats",
+            "booked_seats",
+            "available_seats",
+            "occupancy_rate",
+            "realtime_status",
+        ]
+
+    def get_available_seats(self, obj):
+        return max(obj.total_seats_count - obj.booked_seats_count, 0)
+
+    def get_occupancy_rate(self, obj):
+        return round(obj.occupancy_rate, 1)
+
+    def get_realtime_status(self, obj):
+        return obj.get_realtime_status()
+
+
+class ShowtimeQueueSettingsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Showtime
+        fields = ["id", "queue_enabled", "queue_admit_rate"]
+        read_only_fields = ["id"]
+
+
 class ShowtimeDetailSerializer(ShowtimeSerializer):
     movie_info = serializers.SerializerMethodField()
     auditorium_info = serializers.SerializerMethodField()
@@ -152,23 +315,24 @@ class ShowtimeDetailSerializer(ShowtimeSerializer):
         }
 
     def get_auditorium_info(self, obj):
+        layout = seat_map.get_layout(obj.auditorium)
         return {
             "id": obj.auditorium.id,
             "name": obj.auditorium.name,
-            "total_seats": obj.auditorium.seats.count(),
-            "seat_types": {
-                "standard": obj.auditorium.seats.filter(seat_type="standard").count(),
-                "vip": obj.auditorium.seats.filter(seat_type="vip").count(),
-                "couple": obj.auditorium.seats.filter(seat_type="couple").count(),
-            },
+            "total_seats": len(layout),
+            "seat_types": layout.seat_summary(),
         }
 
     def get_seat_pricing(self, obj):
+        from decimal import Decimal
         from ..models import Seat
 
+        def price(seat_type):
+            return obj.base_price * Decimal(str(Seat.PRICE_MULTIPLIER[seat_type]))
+
         return {
             "base_price": obj.base_price,
-            "standard_price": obj.base_price * Seat.PRICE_MULTIPLIER["standard"],
-            "vip_price": obj.base_price * Seat.PRICE_MULTIPLIER["vip"],
-            "couple_price": obj.base_price * Seat.PRICE_MULTIPLIER["couple"],
+            "standard_price": price("standard"),
+            "vip_price": price("vip"),
+            "couple_price": price("couple"),
         }
@@ -8,9 +8,11 @@ from ..serializers.auditorium import (
     AuditoriumSerializer, AuditoriumDetailSerializer, 
     AuditoriumCreateSerializer, SeatSerializer
 )
+from django.db import transaction
+from services import seat_layouts, seat_map
 
 class AuditoriumViewSet(viewsets.ModelViewSet):
-    queryset = Auditorium.objects.prefetch_related('seats').all()
+    queryset = Auditorium.objects.with_seat_counts().order_by('name')
     filter_backends = [DjangoFilterBackend]
     ordering = ['name']
     
@@ -32,40 +34,47 @@ class AuditoriumViewSet(viewsets.ModelViewSet):
     def seats(self, request, pk=None):
         """Lấy sơ đồ ghế của phòng chiếu"""
         auditorium = self.get_object()
-        seats = auditorium.seats.all().order_by('row_label', 'seat_number')
-        
-        # Nhóm ghế theo hàng
-        seats_by_row = {}
-        for seat in seats:
-            if seat.row_label not in seats_by_row:
-                seats_by_row[seat.row_label] = []
-            seats_by_row[seat.row_label].append(SeatSerializer(seat).data)
+        layout = seat_map.get_layout(auditorium)
         
         return Response({
             'auditorium': AuditoriumSerializer(auditorium).data,
-            'seats_by_row': seats_by_row,
-            'total_seats': seats.count()
+            'seats_by_row': seat_map.build_layout_map(layout),
+            'total_seats': len(layout)
         })
     
     @action(detail=True, methods=['post'])
     def regenerate_seats(self, request, pk=None):
-        """Tạo lại ghế cho phòng chiếu (xóa hết ghế cũ)"""
+        """Đồng bộ ghế của phòng chiếu với sơ đồ (gửi kèm "layout" để đổi sơ đồ).
+        
+        Chỉ ghế thay đổi mới bị sửa/xóa/tạo; ghế đã có vé không thể bị xóa.
+        """
         if not request.user.is_authenticated:
             return Response({'error': 'Authentication required'}, 
                           status=status.HTTP_401_UNAUTHORIZED)
         
         auditorium = self.get_object()
+        definition = request.data.get('layout') or seat_layouts.definition_for(auditorium)
         
-        # Xóa tất cả ghế cũ
-        auditorium.seats.all().delete()
+        try:
+            specs = seat_layouts.parse(definition)
+        except seat_layouts.LayoutError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Tạo lại ghế
-        serializer = AuditoriumCreateSerializer()
-        serializer.create_seats(auditorium)
+        try:
+            with transaction.atomic():
+                if 'layout' in request.data:
+                    auditorium.layout = definition
+                    for field, value in seat_layouts.summarize(specs).items():
+                        setattr(auditorium, field, value)
+                    auditorium.save()
+                changes = seat_layouts.apply_layout(auditorium, specs)
+        except seat_layouts.LayoutError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         
         return Response({
-            'message': f'Đã tạo lại ghế cho phòng {auditorium.name}',
-            'total_seats': auditorium.seats.count()
+            'message': f'Đã cập nhật ghế cho phòng {auditorium.name}',
+            'total_seats': len(specs),
+            'changes': changes,
         })
 
 class SeatViewSet(viewsets.ReadOnlyModelViewSet):
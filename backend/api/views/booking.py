@@ -3,8 +3,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import timedelta
+from ..mixins import IdempotentCreateMixin
 from ..models import Booking, Ticket, Showtime
 from ..serializers.booking import (
     BookingSerializer,
@@ -12,9 +14,10 @@ from ..serializers.booking import (
     BookingDetailSerializer,
     TicketSerializer,
 )
+from services import holds, inventory, ticket_codes
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
     queryset = Booking.objects.all()
     permission_classes = [IsAuthenticated]
@@ -38,6 +41,14 @@ class BookingViewSet(viewsets.ModelViewSet):
             return BookingCreateSerializer
         return BookingSerializer
 
+    def handle_exception(self, exc):
+        if isinstance(exc, holds.SeatsUnavailable):
+            return Response(
+                {"error": str(exc), "conflicts": exc.seats},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return super().handle_exception(exc)
+
     @action(detail=True, methods=["post"])
     def cancel(self, request, pk=None):
         """Hủy booking"""
@@ -50,12 +61,13 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Cập nhật status
-        booking.status = "canceled"  # ← SỬA TỪ 'cancelled'
-        booking.save()
+        with transaction.atomic():
+            # Cập nhật status
+            booking.status = "canceled"  # ← SỬA TỪ 'cancelled'
+            booking.save()
 
-        # Cập nhật tickets
-        booking.tickets.update(status="canceled")  # ← THÊM STATUS CHO TICKET
+            # Cập nhật tickets
+            inventory.transition_tickets(booking.tickets.all(), Ticket.CANCELED)
 
         return Response(
             {"message": "Đã hủy booking thành công", "booking_id": booking.id}
@@ -134,8 +146,9 @@ class TicketViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
         # Check-in thành công
-        ticket.status = "checked_in"
-        ticket.save()
+        inventory.transition_tickets(
+            Ticket.objects.filter(id=ticket.id), Ticket.CHECKED_IN
+        )
 
         return Response(
             {
@@ -145,3 +158,40 @@ class TicketViewSet(viewsets.ReadOnlyModelViewSet):
                 "showtime": ticket.showtime.start_time,
             }
         )
+
+    @action(detail=False, methods=["post"], url_path="check_in/scan")
+    def scan(self, request):
+        """Nhân viên quét mã QR vé tại cổng (Staff only)"""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Chỉ nhân viên mới có thể quét vé"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        # Kiểm tra chữ ký và khung giờ không cần đọc DB
+        try:
+            ticket_code = ticket_codes.verify(request.data.get("code") or "")
+        except ticket_codes.InvalidTicketCode as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        checked_in, ticket_status = ticket_codes.check_in(ticket_code)
+        if not checked_in:
+            if ticket_status == Ticket.CHECKED_IN:
+                error = "Vé đã được check-in"
+            elif ticket_status is None:
+                error = "Vé không tồn tại"
+            else:
+                error = "Chỉ có thể check-in vé đã thanh toán"
+            return Response(
+                {"error": error, "ticket_id": ticket_code.ticket_id, "status": ticket_status},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response(
+            {
+                "message": "Check-in thành công",
+                "ticket_id": ticket_code.ticket_id,
+                "showtime_id": ticket_code.showtime_id,
+                "seat": ticket_code.seat_label,
+            }
+        )
@@ -3,38 +3,38 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from django.utils import timezone
-from django.db.models import Q, Exists, OuterRef
-from ..models import Movie, Genre, Showtime
+from ..models import Movie, Genre
 from ..serializers.movie import MovieSerializer, MovieCreateSerializer, GenreSerializer
+from ..filters import MovieSearchFilter
+from services import genres, movie_search, now_showing
 
 
 class MovieViewSet(viewsets.ModelViewSet):
     queryset = Movie.objects.all()
+    # MovieSearchFilter đứng sau OrderingFilter để xếp theo độ liên quan
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        MovieSearchFilter,
     ]
     filterset_fields = ["rating"]
-    search_fields = ["title", "description"]
     ordering_fields = ["release_date", "title"]
     ordering = ["-release_date"]
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action in ["list", "retrieve"]:
+            queryset = queryset.with_genre_links()
 
         # ✅ LOGIC MỚI: Chỉ hiển thị phim còn suất chiếu trong tương lai
-        # (Trừ khi là admin)
-        if not self.request.user.is_authenticated or not self.request.user.is_staff:
-            # Lọc phim có ít nhất 1 suất chiếu chưa bắt đầu
-            queryset = queryset.filter(
-                Exists(
-                    Showtime.objects.filter(
-                        movie=OuterRef("pk"), start_time__gte=timezone.now()
-                    )
-                )
-            )
+        # (Trừ khi là admin). Tập phim lấy từ cache now_showing thay vì
+        # EXISTS trên bảng Showtime mỗi request
+        section = self.request.query_params.get("section")
+        if section not in (now_showing.NOW_SHOWING, now_showing.COMING_SOON):
+            section = None
+        is_staff = self.request.user.is_authenticated and self.request.user.is_staff
+        if section or not is_staff:
+            queryset = queryset.filter(id__in=now_showing.movie_ids(section))
 
         return queryset
 
@@ -45,15 +45,69 @@ class MovieViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         # Cho phép xem danh sách và chi tiết phim không cần đăng nhập
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "autocomplete"]:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
 
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """Gợi ý tên phim theo tiền tố (không dấu), từ index trong bộ nhớ"""
+        query = request.query_params.get("q", "")
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 20)
+        except ValueError:
+            limit = 10
+
+        if request.user.is_authenticated and request.user.is_staff:
+            suggestions = movie_search.get_index().autocomplete(query, limit)
+        else:
+            # Như danh sách phim: chỉ gợi ý phim còn suất chiếu sắp tới
+            candidates = movie_search.get_index().autocomplete(query, limit * 5)
+            showing = now_showing.movie_ids()
+            suggestions = [
+                (movie_id, title)
+                for movie_id, title in candidates
+                if movie_id in showing
+            ][:limit]
+
+        return Response(
+            [{"id": movie_id, "title": title} for movie_id, title in suggestions]
+        )
+
+    # Ghi phim -> làm mới index tìm kiếm và tập phim đang chiếu
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        movie_search.invalidate()
+        now_showing.invalidate()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        movie_search.invalidate()
+        now_showing.invalidate()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        movie_search.invalidate()
+        now_showing.invalidate()
+
 class GenreViewSet(viewsets.ModelViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [AllowAny]
     ordering = ["name"]
+
+    # Ghi thể loại -> làm mới cache tên thể loại
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        genres.invalidate()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        genres.invalidate()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        genres.invalidate()
@@ -6,12 +6,13 @@ from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import models
 from datetime import timedelta
+from ..mixins import IdempotentCreateMixin
 from ..models import Payment, Booking
 from ..serializers.payment import (
     PaymentSerializer, PaymentCreateSerializer, PaymentDetailSerializer, RefundSerializer
 )
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     queryset = Payment.objects.all()
     permission_classes = [IsAuthenticated]
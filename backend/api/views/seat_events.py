@@ -0,0 +1,55 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from ..models import Showtime
+from services import inventory, seat_events
+
+# Gửi comment rỗng định kỳ để proxy không cắt kết nối
+HEARTBEAT_SECONDS = 15
+
+
+def _current_seat_version(showtime_id):
+    try:
+        showtime = Showtime.objects.select_related("inventory").get(id=showtime_id)
+    except Showtime.DoesNotExist:
+        raise Http404("Suất chiếu không tồn tại")
+    return inventory.ensure_inventory(showtime).seat_version
+
+
+async def showtime_seat_stream(request, pk):
+    """SSE: đẩy sự kiện giữ chỗ/nhả ghế/thanh toán/hết hạn của suất chiếu"""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "Luồng sự kiện ghế chỉ hỗ trợ khi chạy server ASGI"},
+            status=501,
+        )
+
+    await sync_to_async(_current_seat_version)(pk)
+
+    async def stream():
+        subscription = seat_events.get_broker().subscribe(pk)
+        try:
+            # Đọc version sau khi đã subscribe để không lỡ sự kiện nào
+            seat_version = await sync_to_async(_current_seat_version)(pk)
+            yield seat_events.encode(
+                {
+                    "type": "snapshot",
+                    "showtime_id": str(pk),
+                    "seat_version": seat_version,
+                }
+            )
+            while True:
+                try:
+                    message = await subscription.get(HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield message
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
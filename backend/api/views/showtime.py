@@ -2,21 +2,41 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.http import HttpResponse
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import datetime, timedelta
-from ..models import Showtime, Movie, Auditorium
-from ..models import Seat
+import uuid
+from ..models import Showtime, Movie
+from ..models import Seat, Ticket
 from ..serializers.showtime import (
     ShowtimeSerializer,
     ShowtimeCreateSerializer,
+    ShowtimeBulkCreateSerializer,
+    ShowtimeGenerateSerializer,
     ShowtimeDetailSerializer,
+    ShowtimeDashboardSerializer,
+    ShowtimeQueueSettingsSerializer,
 )
+from ..serializers.booking import BookingCreateSerializer, BookingSerializer
+from ..pagination import ShowtimeCursorPagination
+from rest_framework.utils.urls import replace_query_param
 from django.db import models
+from services import (
+    holds,
+    inventory,
+    manifest,
+    now_showing,
+    scheduling,
+    seat_map,
+    waiting_room,
+)
 
 
 class ShowtimeViewSet(viewsets.ModelViewSet):
-    queryset = Showtime.objects.select_related("movie", "auditorium").all()
+    queryset = Showtime.objects.select_related(
+        "movie", "auditorium", "inventory"
+    ).with_availability()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ["movie", "auditorium", "status"]
     ordering_fields = ["start_time", "base_price"]
@@ -37,6 +57,7 @@ class ShowtimeViewSet(viewsets.ModelViewSet):
             "upcoming",
             "by_movie",
             "seats",
+            "seat_changes",
         ]:
             permission_classes = [AllowAny]
         else:
@@ -49,8 +70,11 @@ class ShowtimeViewSet(viewsets.ModelViewSet):
         # ✅ LOGIC MỚI: Chỉ hiển thị suất chiếu chưa bắt đầu (cho user)
         # Admin vẫn thấy tất cả
         if not self.request.user.is_authenticated or not self.request.user.is_staff:
-            # Lọc bỏ suất chiếu đã bắt đầu (start_time < now)
-            queryset = queryset.filter(start_time__gte=timezone.now())
+            # Lọc bỏ suất chiếu đã bắt đầu: theo cột status (index status,
+            # start_time), start_time >= now phòng khi sweeper chưa chạy tới
+            queryset = queryset.filter(
+                status=Showtime.SCHEDULED, start_time__gte=timezone.now()
+            )
 
         # Filter theo ngày nếu có query param
         date = self.request.query_params.get("date", None)
@@ -63,6 +87,19 @@ class ShowtimeViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    # Thêm/sửa/xóa suất chiếu -> làm mới tập phim đang chiếu
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        now_showing.invalidate()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        now_showing.invalidate()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        now_showing.invalidate()
+
     @action(detail=False, methods=["get"])
     def today(self, request):
         """Suất chiếu hôm nay"""
@@ -133,118 +170,386 @@ class ShowtimeViewSet(viewsets.ModelViewSet):
             }
         )
 
-    # Thay thế method seats() trong api/views/showtime.py
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Tạo nhiều suất chiếu trong một transaction (Admin only)"""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Chỉ admin mới có thể tạo suất chiếu"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = ShowtimeBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            showtimes = serializer.save()
+        except scheduling.ScheduleConflict as e:
+            return Response(
+                {"error": "Trùng lịch suất chiếu", "conflicts": e.args[0]},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response(
+            {
+                "created": len(showtimes),
+                "showtimes": [str(showtime.id) for showtime in showtimes],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"])
+    def generate(self, request):
+        """Tự xếp lịch chiếu (Admin only): commit=false trả về bản xem trước,
+        commit=true lưu lịch qua đường tạo theo lô"""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Chỉ admin mới có thể tạo suất chiếu"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = ShowtimeGenerateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items, stats = serializer.generate()
+
+        committed = serializer.validated_data["commit"] and bool(items)
+        if committed:
+            try:
+                scheduling.bulk_schedule(items)
+            except scheduling.ScheduleConflict as e:
+                return Response(
+                    {"error": "Trùng lịch suất chiếu", "conflicts": e.args[0]},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+        return Response(
+            {
+                "committed": committed,
+                "stats": stats,
+                "showtimes": [
+                    {
+                        "movie": str(item["movie"].id),
+                        "movie_title": item["movie"].title,
+                        "auditorium": str(item["auditorium"].id),
+                        "auditorium_name": item["auditorium"].name,
+                        "start_time": item["start_time"],
+                        "end_time": item["end_time"],
+                        "base_price": item["base_price"],
+                    }
+                    for item in items
+                ],
+            },
+            status=status.HTTP_201_CREATED if committed else status.HTTP_200_OK,
+        )
 
     @action(detail=True, methods=["get"])
     def seats(self, request, pk=None):
         """Xem sơ đồ ghế và tình trạng đặt cho suất chiếu"""
         showtime = self.get_object()
+        seat_inventory = inventory.ensure_inventory(showtime)
+        now = timezone.now()
+        can_book = showtime.status == "scheduled" and showtime.start_time > now
+
+        # Sơ đồ ghế không đổi -> trả 304, không cần đọc ticket. Vé giữ chỗ
+        # hết hạn nhưng chưa bị sweeper hủy không làm tăng seat_version nên
+        # được tính riêng vào ETag
+        expired_holds = 0
+        if seat_inventory.reserved_count:
+            expired_holds = (
+                Ticket.objects.filter(showtime=showtime).expired_holds().count()
+            )
+        etag = seat_map.seat_map_etag(
+            showtime, seat_inventory.seat_version, can_book, expired_holds
+        )
+        if etag in self._if_none_match(request):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            return self._with_etag(response, etag)
+
+        occupancy = seat_map.get_occupancy(showtime)
+        seats_by_row = seat_map.build_seat_map(occupancy, showtime.base_price)
+        prices = seat_map.seat_prices(showtime.base_price)
+
+        # Thống kê availability
+        total_seats = len(occupancy.layout)
+        total_booked = occupancy.booked_count
+
+        response = Response(
+            {
+                "showtime": {
+                    "id": str(showtime.id),
+                    "movie_title": showtime.movie.title,
+                    "auditorium_name": showtime.auditorium.name,
+                    "start_time": showtime.start_time,
+                    "end_time": showtime.end_time,
+                    "base_price": float(showtime.base_price),
+                    "status": showtime.status,
+                },
+                "seat_version": seat_inventory.seat_version,
+                "layout_version": occupancy.layout.version,
+                "seats_by_row": seats_by_row,
+                "seat_pricing": {
+                    "base_price": float(showtime.base_price),
+                    "standard_price": prices[Seat.STANDARD],
+                    "vip_price": prices[Seat.VIP],
+                    "couple_price": prices[Seat.COUPLE],
+                },
+                "availability": {
+                    "total_seats": total_seats,
+                    "booked_seats": total_booked,
+                    "available_seats": total_seats - total_booked,
+                    "occupancy_rate": (
+                        round((total_booked / total_seats) * 100, 1)
+                        if total_seats > 0
+                        else 0
+                    ),
+                },
+                "booking_info": {
+                    "can_book": can_book,
+                    "booking_deadline": showtime.start_time
+                    - timedelta(minutes=30),  # 30 phút trước chiếu
+                    "time_until_showtime": (
+                        (showtime.start_time - now).total_seconds()
+                        if showtime.start_time > now
+                        else 0
+                    ),
+                },
+            }
+        )
+        return self._with_etag(response, etag)
 
+    @action(detail=True, methods=["get"], url_path="seats/changes")
+    def seat_changes(self, request, pk=None):
+        """Các ghế đổi trạng thái kể từ seat_version `since`"""
         try:
-            from ..models import Ticket
-
-            # Lấy tất cả ghế trong auditorium
-            seats = showtime.auditorium.seats.all().order_by("row_label", "seat_number")
-
-            # Lấy danh sách ghế đã được đặt cho suất chiếu này
-            booked_seat_ids = Ticket.objects.filter(
-                showtime=showtime,
-                status__in=[
-                    "reserved",
-                    "paid",
-                    "checked_in",
-                ],  # ← GIỮ NGUYÊN (đúng cho Ticket)
-            ).values_list("seat_id", flat=True)
-
-            # Nhóm ghế theo hàng
-            seats_by_row = {}
-            total_booked = 0
-
-            for seat in seats:
-                if seat.row_label not in seats_by_row:
-                    seats_by_row[seat.row_label] = []
-
-                # Kiểm tra ghế có được đặt không
-                is_booked = seat.id in booked_seat_ids
-                if is_booked:
-                    total_booked += 1
-
-                # Basic seat info
-                seat_data = {
-                    "id": str(seat.id),
-                    "row_label": seat.row_label,
-                    "seat_number": seat.seat_number,
-                    "seat_type": seat.seat_type,
-                    "is_available": not is_booked,  # ← Real-time availability
+            since = int(request.query_params.get("since", ""))
+        except ValueError:
+            return Response(
+                {"error": "since phải là số nguyên"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        showtime = self.get_object()
+        seat_inventory = inventory.ensure_inventory(showtime)
+
+        changes = {}
+        if since < seat_inventory.seat_version:
+            # Ticket mới nhất của mỗi ghế quyết định trạng thái hiện tại
+            changed_tickets = (
+                Ticket.objects.filter(showtime=showtime, seat_version__gt=since)
+                .order_by("seat_version")
+                .values_list("seat_id", "status")
+            )
+            for seat_id, ticket_status in changed_tickets:
+                is_booked = ticket_status in Ticket.ACTIVE_STATUSES
+                changes[str(seat_id)] = {
+                    "id": str(seat_id),
+                    "is_available": not is_booked,
                     "status": "booked" if is_booked else "available",
                 }
 
-                # Tính giá vé theo loại ghế
-                try:
-                    multiplier = seat.PRICE_MULTIPLIER.get(seat.seat_type, 1.0)
-                    seat_data["price_multiplier"] = multiplier
-                    seat_data["ticket_price"] = float(showtime.base_price) * multiplier
-                except:
-                    seat_data["price_multiplier"] = 1.0
-                    seat_data["ticket_price"] = float(showtime.base_price)
+        if seat_inventory.reserved_count:
+            # Vé giữ chỗ đã hết hạn coi như ghế trống dù chưa được hủy
+            expired_seat_ids = (
+                Ticket.objects.filter(showtime=showtime)
+                .expired_holds()
+                .values_list("seat_id", flat=True)
+            )
+            for seat_id in expired_seat_ids:
+                changes[str(seat_id)] = {
+                    "id": str(seat_id),
+                    "is_available": True,
+                    "status": "available",
+                }
+
+        return Response(
+            {
+                "showtime_id": str(showtime.id),
+                "since": since,
+                "seat_version": seat_inventory.seat_version,
+                "layout_version": showtime.auditorium.layout_version,
+                "changes": list(changes.values()),
+            }
+        )
+
+    @action(detail=True, methods=["post"])
+    def best_available(self, request, pk=None):
+        """Tự chọn khối ghế liền nhau tốt nhất và giữ chỗ luôn"""
+        try:
+            party_size = int(request.data.get("party_size", 0))
+        except (TypeError, ValueError):
+            party_size = 0
+        if not 1 <= party_size <= 10:
+            return Response(
+                {"error": "party_size phải từ 1 đến 10"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        seat_type = request.data.get("seat_type") or None
+        if seat_type is not None and seat_type not in Seat.PRICE_MULTIPLIER:
+            return Response(
+                {"error": "Loại ghế không hợp lệ"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-                seats_by_row[seat.row_label].append(seat_data)
+        showtime = self.get_object()
+
+        # Ghế vừa tìm được có thể bị người khác giữ trước: tải lại sơ đồ và
+        # chọn lại vài lần thay vì bắt client chọn lại
+        for _ in range(3):
+            occupancy = seat_map.get_occupancy(showtime)
+            block = seat_map.find_best_block(occupancy, party_size, seat_type)
+            if block is None:
+                return Response(
+                    {"error": f"Không còn {party_size} ghế trống liền nhau phù hợp"},
+                    status=status.HTTP_409_CONFLICT,
+                )
 
-            # Thống kê availability
-            total_seats = seats.count()
-            available_seats = total_seats - total_booked
+            serializer = BookingCreateSerializer(
+                data={
+                    "showtime": showtime.id,
+                    "seat_ids": [occupancy.layout.seat_ids[i] for i in block],
+                },
+                context={"request": request},
+            )
+            serializer.is_valid(raise_exception=True)
+            try:
+                booking = serializer.save()
+            except holds.SeatsUnavailable:
+                continue
 
             return Response(
                 {
-                    "showtime": {
-                        "id": str(showtime.id),
-                        "movie_title": showtime.movie.title,
-                        "auditorium_name": showtime.auditorium.name,
-                        "start_time": showtime.start_time,
-                        "end_time": showtime.end_time,
-                        "base_price": float(showtime.base_price),
-                        "status": showtime.status,
-                    },
-                    "seats_by_row": seats_by_row,
-                    "seat_pricing": {
-                        "base_price": float(showtime.base_price),
-                        "standard_price": float(showtime.base_price)
-                        * Seat.PRICE_MULTIPLIER[Seat.STANDARD],
-                        "vip_price": float(showtime.base_price)
-                        * Seat.PRICE_MULTIPLIER[Seat.VIP],
-                        "couple_price": float(showtime.base_price)
-                        * Seat.PRICE_MULTIPLIER[Seat.COUPLE],
-                    },
-                    "availability": {
-                        "total_seats": total_seats,
-                        "booked_seats": total_booked,
-                        "available_seats": available_seats,
-                        "occupancy_rate": (
-                            round((total_booked / total_seats) * 100, 1)
-                            if total_seats > 0
-                            else 0
-                        ),
-                    },
-                    "booking_info": {
-                        "can_book": showtime.status == "scheduled"
-                        and showtime.start_time > timezone.now(),
-                        "booking_deadline": showtime.start_time
-                        - timedelta(minutes=30),  # 30 phút trước chiếu
-                        "time_until_showtime": (
-                            (showtime.start_time - timezone.now()).total_seconds()
-                            if showtime.start_time > timezone.now()
-                            else 0
-                        ),
-                    },
-                }
+                    "booking": BookingSerializer(booking).data,
+                    "seats": [occupancy.layout.label(i) for i in block],
+                },
+                status=status.HTTP_201_CREATED,
+            )
+
+        return Response(
+            {"error": "Ghế đang được đặt liên tục, vui lòng thử lại"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    @action(detail=True, methods=["post"], url_path="queue/join")
+    def queue_join(self, request, pk=None):
+        """Vào phòng chờ, nhận token theo thứ tự"""
+        showtime = self.get_object()
+        if not showtime.queue_enabled:
+            return Response(
+                {"error": "Suất chiếu không dùng phòng chờ", "admitted": True},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(waiting_room.join(showtime, request.user))
+
+    @action(detail=True, methods=["get"], url_path="queue/status")
+    def queue_status(self, request, pk=None):
+        """Vị trí hiện tại trong phòng chờ của token"""
+        showtime = self.get_object()
+        if not showtime.queue_enabled:
+            return Response({"admitted": True})
+        try:
+            return Response(
+                waiting_room.status(
+                    showtime, request.user, request.query_params.get("token")
+                )
+            )
+        except waiting_room.QueueTokenInvalid as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=["patch"], url_path="queue/settings")
+    def queue_settings(self, request, pk=None):
+        """Bật/tắt phòng chờ và tốc độ cho vào (Admin only)"""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Chỉ admin mới có thể cấu hình phòng chờ"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        showtime = self.get_object()
+        serializer = ShowtimeQueueSettingsSerializer(
+            showtime, data=request.data, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def manifest(self, request, pk=None):
+        """Danh sách vé cho cổng soát vé offline, nén gzip (Staff only)"""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "Chỉ nhân viên mới có thể tải danh sách vé"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return Response(
+                    {"error": "since phải là số nguyên"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        showtime = self.get_object()
+        seat_inventory = inventory.ensure_inventory(showtime)
+        etag = f'"manifest-{showtime.id}-{seat_inventory.seat_version}-{since}"'
+        if etag in self._if_none_match(request):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            return self._with_etag(response, etag)
+
+        data = manifest.build(showtime, since)
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response = HttpResponse(
+                manifest.compress(data), content_type="application/json"
             )
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = Response(data)
+        response["Vary"] = "Accept-Encoding"
+        return self._with_etag(response, etag)
 
-        except Exception as e:
+    @action(detail=True, methods=["post"], url_path="manifest/check_ins")
+    def manifest_check_ins(self, request, pk=None):
+        """Gửi lên theo lô các vé đã check-in offline (Staff only)"""
+        if not request.user.is_staff:
             return Response(
-                {"error": f"Server error: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                {"error": "Chỉ nhân viên mới có thể check-in vé"},
+                status=status.HTTP_403_FORBIDDEN,
             )
 
+        raw_ids = request.data.get("ticket_ids")
+        if not isinstance(raw_ids, list) or not raw_ids:
+            return Response(
+                {"error": "ticket_ids phải là danh sách không rỗng"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(raw_ids) > manifest.MAX_CHECK_IN_BATCH:
+            return Response(
+                {"error": f"Tối đa {manifest.MAX_CHECK_IN_BATCH} vé mỗi lô"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            ticket_ids = [uuid.UUID(str(ticket_id)) for ticket_id in raw_ids]
+        except ValueError:
+            return Response(
+                {"error": "ticket_id không hợp lệ"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        showtime = self.get_object()
+        return Response(manifest.apply_check_ins(showtime, ticket_ids))
+
+    def _if_none_match(self, request):
+        header = request.headers.get("If-None-Match", "")
+        return {tag.strip() for tag in header.split(",") if tag.strip()}
+
+    def _with_etag(self, response, etag):
+        response["ETag"] = etag
+        # Trình duyệt luôn hỏi lại server kèm If-None-Match
+        response["Cache-Control"] = "no-cache"
+        return response
+
     @action(detail=True, methods=["get"])
     def bookings(self, request, pk=None):
         """Xem danh sách booking cho suất chiếu (Admin only)"""
@@ -310,27 +615,30 @@ class ShowtimeViewSet(viewsets.ModelViewSet):
     def occupancy(self, request, pk=None):
         """Xem tỷ lệ lấp đầy phòng chiếu"""
         showtime = self.get_object()
-        total_seats = showtime.auditorium.seats.count()
-
-        # Thống kê ticket theo status
-        ticket_stats = (
-            Ticket.objects.filter(showtime=showtime)
-            .values("status")
-            .annotate(count=models.Count("id"))
-        )
+        seat_inventory = inventory.ensure_inventory(showtime)
+        total_seats = seat_inventory.total_seats
 
+        # Số ghế đang chiếm lấy từ bộ đếm, chỉ đếm thêm các vé đã hủy/hoàn
         stats = {
-            "reserved": 0,
-            "paid": 0,
-            "checked_in": 0,
+            "reserved": seat_inventory.reserved_count,
+            "paid": seat_inventory.paid_count,
+            "checked_in": seat_inventory.checked_in_count,
             "canceled": 0,
             "refunded": 0,
         }
 
+        ticket_stats = (
+            Ticket.objects.filter(
+                showtime=showtime, status__in=[Ticket.CANCELED, Ticket.REFUNDED]
+            )
+            .values("status")
+            .annotate(count=models.Count("id"))
+        )
+
         for stat in ticket_stats:
             stats[stat["status"]] = stat["count"]
 
-        booked_seats = stats["reserved"] + stats["paid"] + stats["checked_in"]
+        booked_seats = seat_inventory.booked_count
 
         return Response(
             {
@@ -380,30 +688,26 @@ class ShowtimeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        from ..models import Ticket, Seat
+        occupancy = seat_map.get_occupancy(showtime)
+        layout = occupancy.layout
+        prices = seat_map.seat_prices(showtime.base_price)
 
-        # Lấy thông tin ghế
-        seats = Seat.objects.filter(id__in=seat_ids, auditorium=showtime.auditorium)
-
-        # Check availability
-        booked_seat_ids = Ticket.objects.filter(
-            showtime=showtime,
-            seat__in=seats,
-            status__in=["reserved", "paid", "checked_in"],
-        ).values_list("seat_id", flat=True)
+        # Chỉ xét các ghế thuộc phòng chiếu, giữ thứ tự trong sơ đồ
+        requested, _ = layout.mask_for(seat_ids)
+        booked = occupancy.conflicts(requested)
 
         seat_status = []
-        for seat in seats:
-            is_available = seat.id not in booked_seat_ids
+        for i in layout.indexes(requested):
+            seat_id, row_label, seat_number, seat_type = layout.seats[i]
+            is_available = not (booked >> i & 1)
             seat_status.append(
                 {
-                    "seat_id": str(seat.id),
-                    "seat_label": f"{seat.row_label}{seat.seat_number}",
-                    "seat_type": seat.seat_type,
+                    "seat_id": seat_id,
+                    "seat_label": f"{row_label}{seat_number}",
+                    "seat_type": seat_type,
                     "is_available": is_available,
                     "status": "available" if is_available else "booked",
-                    "price": float(showtime.base_price)
-                    * seat.PRICE_MULTIPLIER[seat.seat_type],
+                    "price": prices[seat_type],
                 }
             )
 
@@ -416,49 +720,55 @@ class ShowtimeViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
-    def admin_all(self, request):
-        """✅ ADMIN: Xem tất cả showtime với trạng thái real-time"""
+    def dashboard(self, request):
+        """ADMIN: Dashboard suất chiếu theo trạng thái (cột status: đang chiếu
+        / sắp chiếu / đã kết thúc).
+
+        Số lượng mỗi nhóm lấy bằng một câu aggregate có điều kiện; mỗi nhóm là
+        một danh sách phân trang theo con trỏ, tỉ lệ lấp đầy được annotate
+        trong cùng truy vấn. ?bucket=<nhóm>&cursor=... để lấy trang tiếp theo.
+        """
         if not request.user.is_staff:
             return Response(
                 {"error": "Chỉ admin mới có thể xem"},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Lấy TẤT CẢ showtime (không filter)
-        showtimes = (
-            Showtime.objects.select_related("movie", "auditorium")
-            .all()
-            .order_by("-start_time")
-        )
-
-        # Phân nhóm theo trạng thái
-        now = timezone.now()
-        showing = []  # Đang chiếu
-        upcoming = []  # Sắp chiếu
-        finished = []  # Đã kết thúc
+        buckets = Showtime.objects.bucket_filters()
+        orderings = {
+            "showing": ("start_time", "id"),
+            "upcoming": ("start_time", "id"),
+            "finished": ("-start_time", "-id"),
+        }
+        base = Showtime.objects.select_related("movie", "auditorium", "inventory")
 
-        for showtime in showtimes:
-            realtime = showtime.get_realtime_status()
-            data = ShowtimeSerializer(showtime).data
-            data["realtime_status"] = realtime
+        def bucket_page(name):
+            paginator = ShowtimeCursorPagination()
+            paginator.ordering = orderings[name]
+            page = paginator.paginate_queryset(
+                base.filter(buckets[name]).with_occupancy(), request, view=self
+            )
+            next_link = paginator.get_next_link()
+            previous_link = paginator.get_previous_link()
+            return {
+                "next": next_link and replace_query_param(next_link, "bucket", name),
+                "previous": previous_link
+                and replace_query_param(previous_link, "bucket", name),
+                "results": ShowtimeDashboardSerializer(page, many=True).data,
+            }
 
-            if realtime["status"] == "showing":
-                showing.append(data)
-            elif realtime["status"] == "finished":
-                finished.append(data)
-            else:
-                upcoming.append(data)
+        bucket = request.query_params.get("bucket")
+        if bucket:
+            if bucket not in buckets:
+                return Response(
+                    {"error": f"bucket phải là một trong: {', '.join(buckets)}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return Response({"bucket": bucket, **bucket_page(bucket)})
 
         return Response(
             {
-                "summary": {
-                    "total": showtimes.count(),
-                    "showing": len(showing),
-                    "upcoming": len(upcoming),
-                    "finished": len(finished),
-                },
-                "showing": showing,
-                "upcoming": upcoming,
-                "finished": finished,
+                "summary": Showtime.objects.bucket_counts(),
+                **{name: bucket_page(name) for name in buckets},
             }
         )
@@ -3,6 +3,12 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Luồng sự kiện ghế (/api/showtime/<id>/seats/stream/) cần chạy qua ASGI, ví dụ:
+    uvicorn config.asgi:application --workers 4
+SEAT_EVENT_BROKER mặc định là PostgresNotifyBroker nên các worker và
+run_sweeper chia sẻ sự kiện qua Postgres; InMemoryBroker chỉ đúng khi mọi
+thay đổi ghế (kể cả hủy booking hết hạn) xảy ra trong cùng một process.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     "rest_framework",
     "django_filters",
     'rest_framework_simplejwt',
@@ -52,7 +54,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'api.middleware.BookingExpiryMiddleware',
     'corsheaders.middleware.CorsMiddleware',
 ]
 
@@ -171,4 +172,28 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-queue-token')
+
+# Broker pub/sub cho luồng sự kiện ghế (SSE). LISTEN/NOTIFY để sự kiện từ
+# run_sweeper (hết hạn giữ chỗ) và các worker khác tới được người xem;
+# 'services.seat_events.InMemoryBroker' nếu chỉ chạy một process
+SEAT_EVENT_BROKER = 'services.seat_events.PostgresNotifyBroker'
+
+# Sweeper nền (python manage.py run_sweeper) thay cho middleware hủy booking
+SWEEPER_INTERVAL_SECONDS = 30
+BOOKING_EXPIRY_BATCH_SIZE = 500
+
+# Khóa thêm khi giữ chỗ (ghế đã được bảo vệ bởi unique index): "none",
+# "row" (SELECT FOR UPDATE theo suất chiếu) hoặc "seat" (advisory lock theo
+# từng ghế, chỉ có tác dụng trên Postgres)
+BOOKING_LOCK_STRATEGY = 'none'
+
+# Thời gian giữ response đã lưu theo Idempotency-Key (giờ)
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+
+# Phòng chờ cho suất chiếu đông khách: store trạng thái hàng chờ
+# (services.waiting_room.InMemoryQueueStore khi chỉ chạy một process) và
+# thời hạn token (giây)
+WAITING_ROOM_STORE = 'services.waiting_room.DatabaseQueueStore'
+WAITING_ROOM_TOKEN_MAX_AGE = 3600
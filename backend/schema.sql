@@ -5,6 +5,10 @@
 
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- btree_gist: exclusion constraint trùng lịch suất chiếu (auditorium_id WITH =)
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+-- pg_trgm: tìm kiếm phim không dấu / gần đúng trên api_movie.search_text
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Tạo django_content_type trước (auth_permission cần nó)
 CREATE TABLE "django_content_type" (
@@ -34,7 +38,7 @@ BEGIN;
 --
 -- Create model Auditorium
 --
-CREATE TABLE "api_auditorium" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "name" varchar(60) NOT NULL UNIQUE, "standard_row_count" integer NOT NULL CHECK ("standard_row_count" >= 0), "vip_row_count" integer NOT NULL CHECK ("vip_row_count" >= 0), "couple_row_count" integer NOT NULL CHECK ("couple_row_count" >= 0), "seats_per_row" integer NOT NULL CHECK ("seats_per_row" >= 0), "created_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP, "updated_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE "api_auditorium" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "name" varchar(60) NOT NULL UNIQUE, "standard_row_count" integer NOT NULL CHECK ("standard_row_count" >= 0), "vip_row_count" integer NOT NULL CHECK ("vip_row_count" >= 0), "couple_row_count" integer NOT NULL CHECK ("couple_row_count" >= 0), "seats_per_row" integer NOT NULL CHECK ("seats_per_row" >= 0), "layout" jsonb NULL, "layout_version" integer NOT NULL DEFAULT 1 CHECK ("layout_version" >= 0), "created_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP, "updated_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP);
 --
 -- Create model Genre
 --
@@ -42,7 +46,7 @@ CREATE TABLE "api_genre" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v
 --
 -- Create model Movie
 --
-CREATE TABLE "api_movie" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "title" varchar(200) NOT NULL, "duration_min" integer NOT NULL CHECK ("duration_min" >= 0), "rating" varchar(10) NULL, "release_date" date NULL, "description" text NOT NULL DEFAULT '', "poster_url" text NOT NULL DEFAULT '');
+CREATE TABLE "api_movie" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "title" varchar(200) NOT NULL, "duration_min" integer NOT NULL CHECK ("duration_min" >= 0), "rating" varchar(10) NULL, "release_date" date NULL, "description" text NOT NULL DEFAULT '', "poster_url" text NOT NULL DEFAULT '', "search_text" text NOT NULL DEFAULT '');
 --
 -- Create model User
 --
@@ -52,11 +56,11 @@ CREATE TABLE "api_user_user_permissions" ("id" bigint NOT NULL PRIMARY KEY GENER
 --
 -- Create model Seat
 --
-CREATE TABLE "api_seat" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "row_label" varchar(5) NOT NULL, "seat_number" integer NOT NULL, "seat_type" varchar(10) NOT NULL DEFAULT 'standard' CHECK ("seat_type" IN ('standard', 'vip', 'couple')), "auditorium_id" uuid NOT NULL);
+CREATE TABLE "api_seat" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "row_label" varchar(5) NOT NULL, "seat_number" integer NOT NULL, "seat_type" varchar(10) NOT NULL DEFAULT 'standard' CHECK ("seat_type" IN ('standard', 'vip', 'couple', 'accessible')), "pair_group" smallint NULL CHECK ("pair_group" >= 0), "auditorium_id" uuid NOT NULL);
 --
 -- Create model Showtime
 --
-CREATE TABLE "api_showtime" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "start_time" timestamp with time zone NOT NULL, "end_time" timestamp with time zone NOT NULL, "base_price" numeric(12, 2) NOT NULL DEFAULT 0, "status" varchar(20) NOT NULL DEFAULT 'scheduled', "auditorium_id" uuid NOT NULL, "movie_id" uuid NOT NULL);
+CREATE TABLE "api_showtime" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "start_time" timestamp with time zone NOT NULL, "end_time" timestamp with time zone NOT NULL, "base_price" numeric(12, 2) NOT NULL DEFAULT 0, "status" varchar(20) NOT NULL DEFAULT 'scheduled' CHECK ("status" IN ('scheduled', 'showing', 'finished')), "queue_enabled" boolean NOT NULL DEFAULT FALSE, "queue_admit_rate" integer NOT NULL DEFAULT 60 CHECK ("queue_admit_rate" >= 0), "auditorium_id" uuid NOT NULL, "movie_id" uuid NOT NULL);
 --
 -- Create model Booking
 --
@@ -64,7 +68,7 @@ CREATE TABLE "api_booking" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate
 --
 -- Create model Ticket
 --
-CREATE TABLE "api_ticket" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "price" numeric(12, 2) NOT NULL, "qr_code" varchar(64) NULL, "status" varchar(20) NOT NULL DEFAULT 'reserved' CHECK ("status" IN ('reserved', 'paid', 'checked_in', 'canceled', 'refunded')), "booked_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP, "booking_id" uuid NOT NULL, "seat_id" uuid NOT NULL, "showtime_id" uuid NOT NULL);
+CREATE TABLE "api_ticket" ("id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(), "price" numeric(12, 2) NOT NULL, "qr_code" varchar(128) NULL, "status" varchar(20) NOT NULL DEFAULT 'reserved' CHECK ("status" IN ('reserved', 'paid', 'checked_in', 'canceled', 'refunded')), "booked_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP, "seat_version" bigint NOT NULL DEFAULT 0 CHECK ("seat_version" >= 0), "booking_id" uuid NOT NULL, "seat_id" uuid NOT NULL, "showtime_id" uuid NOT NULL);
 --
 -- Create model MovieGenre
 --
@@ -82,10 +86,18 @@ CREATE INDEX "api_showtim_movie_i_043b6b_idx" ON "api_showtime" ("movie_id");
 --
 CREATE INDEX "api_showtim_auditor_3717c2_idx" ON "api_showtime" ("auditorium_id", "start_time");
 --
+-- Create index api_showtim_status_start_idx on field(s) status, start_time of model showtime
+--
+CREATE INDEX "api_showtim_status_start_idx" ON "api_showtime" ("status", "start_time");
+--
 -- Alter unique_together for showtime (1 constraint(s))
 --
 ALTER TABLE "api_showtime" ADD CONSTRAINT "api_showtime_auditorium_id_start_time_684efc01_uniq" UNIQUE ("auditorium_id", "start_time");
 --
+-- Create constraint excl_showtime_auditorium_overlap on model showtime
+--
+ALTER TABLE "api_showtime" ADD CONSTRAINT "excl_showtime_auditorium_overlap" EXCLUDE USING gist ("auditorium_id" WITH =, tstzrange("start_time", "end_time") WITH &&);
+--
 -- Create index api_booking_user_id_cfdf50_idx on field(s) user of model booking
 --
 CREATE INDEX "api_booking_user_id_cfdf50_idx" ON "api_booking" ("user_id");
@@ -101,12 +113,15 @@ CREATE INDEX "api_booking_expires_651e73_idx" ON "api_booking" ("expires_at");
 -- Create index api_ticket_showtim_31e4c3_idx on field(s) showtime of model ticket
 --
 CREATE INDEX "api_ticket_showtim_31e4c3_idx" ON "api_ticket" ("showtime_id");
+CREATE INDEX "api_ticket_showtim_seat_version_idx" ON "api_ticket" ("showtime_id", "seat_version");
 --
--- Alter unique_together for ticket (1 constraint(s))
+-- Create constraint uniq_active_ticket_per_seat on model ticket
 --
-ALTER TABLE "api_ticket" ADD CONSTRAINT "api_ticket_showtime_id_seat_id_c45a7e90_uniq" UNIQUE ("showtime_id", "seat_id");
+CREATE UNIQUE INDEX "uniq_active_ticket_per_seat" ON "api_ticket" ("showtime_id", "seat_id") WHERE "status" IN ('reserved', 'paid', 'checked_in');
 CREATE INDEX "api_auditorium_name_af3b8bc3_like" ON "api_auditorium" ("name" varchar_pattern_ops);
 CREATE INDEX "api_genre_name_321d7007_like" ON "api_genre" ("name" varchar_pattern_ops);
+-- Trigram index cho LIKE '%từ%' và toán tử %> (services.movie_search)
+CREATE INDEX "api_movie_search_text_trgm" ON "api_movie" USING gin ("search_text" gin_trgm_ops);
 CREATE INDEX "api_user_username_cf4e88d2_like" ON "api_user" ("username" varchar_pattern_ops);
 CREATE INDEX "api_user_email_9ef5afa6_like" ON "api_user" ("email" varchar_pattern_ops);
 ALTER TABLE "api_user_groups" ADD CONSTRAINT "api_user_groups_user_id_group_id_9c7ddfb5_uniq" UNIQUE ("user_id", "group_id");
@@ -234,6 +249,45 @@ LEFT JOIN api_moviegenre mg ON m.id = mg.movie_id
 LEFT JOIN api_genre g ON mg.genre_id = g.id
 GROUP BY m.id, m.title, m.duration_min, m.rating, m.release_date, m.description, m.poster_url;
 
+-- TABLE: Bộ đếm ghế theo suất chiếu (cập nhật cùng transaction với ticket)
+CREATE TABLE "api_showtimeinventory" (
+    "showtime_id" uuid NOT NULL PRIMARY KEY,
+    "total_seats" integer NOT NULL DEFAULT 0 CHECK ("total_seats" >= 0),
+    "reserved_count" integer NOT NULL DEFAULT 0 CHECK ("reserved_count" >= 0),
+    "paid_count" integer NOT NULL DEFAULT 0 CHECK ("paid_count" >= 0),
+    "checked_in_count" integer NOT NULL DEFAULT 0 CHECK ("checked_in_count" >= 0),
+    "seat_version" bigint NOT NULL DEFAULT 0 CHECK ("seat_version" >= 0),
+    "updated_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "api_showtimeinventory_showtime_id_fk_api_showtime_id"
+        FOREIGN KEY ("showtime_id") REFERENCES "api_showtime" ("id") DEFERRABLE INITIALLY DEFERRED
+);
+
+-- TABLE: Trạng thái hàng chờ của suất chiếu đông khách
+CREATE TABLE "api_showtimequeue" (
+    "showtime_id" uuid NOT NULL PRIMARY KEY,
+    "issued_count" bigint NOT NULL DEFAULT 0 CHECK ("issued_count" >= 0),
+    "admitted_count" bigint NOT NULL DEFAULT 0 CHECK ("admitted_count" >= 0),
+    "updated_at" timestamp with time zone NOT NULL,
+    CONSTRAINT "api_showtimequeue_showtime_id_fk_api_showtime_id"
+        FOREIGN KEY ("showtime_id") REFERENCES "api_showtime" ("id") DEFERRABLE INITIALLY DEFERRED
+);
+
+-- TABLE: Response đã lưu theo Idempotency-Key (dọn định kỳ theo expires_at)
+CREATE TABLE "api_idempotencykey" (
+    "id" uuid NOT NULL PRIMARY KEY DEFAULT uuid_generate_v4(),
+    "key" varchar(255) NOT NULL,
+    "request_hash" varchar(64) NOT NULL,
+    "response_status" smallint NULL CHECK ("response_status" >= 0),
+    "response_body" jsonb NULL,
+    "created_at" timestamp with time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "expires_at" timestamp with time zone NOT NULL,
+    "user_id" uuid NOT NULL,
+    CONSTRAINT "uniq_idempotency_key_per_user" UNIQUE ("user_id", "key"),
+    CONSTRAINT "api_idempotencykey_user_id_fk_api_user_id"
+        FOREIGN KEY ("user_id") REFERENCES "api_user" ("id") DEFERRABLE INITIALLY DEFERRED
+);
+CREATE INDEX "api_idempote_expires_at_idx" ON "api_idempotencykey" ("expires_at");
+
 -- SEED DATA: Insert initial genres
 INSERT INTO api_genre (name) VALUES 
     ('Action'), 
@@ -1,5 +1,5 @@
-from django.utils import timezone
 from api.models import Showtime, Seat, Ticket
+from services import seat_map
 
 def get_available_seats(showtime_id):
     """Lấy danh sách ghế trống cho suất chiếu"""
@@ -12,17 +12,16 @@ def get_available_seats(showtime_id):
         
         # Lấy ghế đã được đặt cho suất chiếu này
         booked_seats = Ticket.objects.filter(
-            showtime=showtime,
-            status__in=['reserved', 'paid', 'checked_in']
-        ).values_list('seat_id', flat=True)
+            showtime=showtime
+        ).active().values_list('seat_id', flat=True)
         
         # Ghế còn trống
         available_seats = all_seats.exclude(id__in=booked_seats)
         
         return {
             'showtime': showtime,
-            'total_seats': all_seats.count(),
-            'booked_seats': len(booked_seats),
+            'total_seats': showtime.get_total_seats_count(),
+            'booked_seats': showtime.get_booked_seats_count(),
             'available_seats': available_seats
         }
     except Showtime.DoesNotExist:
@@ -30,15 +29,17 @@ def get_available_seats(showtime_id):
 
 def check_seat_availability(showtime_id, seat_ids):
     """Kiểm tra danh sách ghế có còn trống không"""
-    availability = get_available_seats(showtime_id)
-    if not availability:
+    try:
+        showtime = Showtime.objects.select_related('auditorium').get(id=showtime_id)
+    except Showtime.DoesNotExist:
         return False, "Suất chiếu không tồn tại"
     
-    available_seat_ids = set(availability['available_seats'].values_list('id', flat=True))
-    requested_seat_ids = set(seat_ids)
+    occupancy = seat_map.get_occupancy(showtime)
+    requested, unknown_seats = occupancy.layout.mask_for(seat_ids)
+    booked = occupancy.conflicts(requested)
     
-    if not requested_seat_ids.issubset(available_seat_ids):
-        unavailable_seats = requested_seat_ids - available_seat_ids
-        return False, f"Ghế đã được đặt: {list(unavailable_seats)}"
+    if unknown_seats or booked:
+        unavailable_seats = list(unknown_seats) + occupancy.layout.ids_for(booked)
+        return False, f"Ghế đã được đặt: {unavailable_seats}"
     
-    return True, "Ghế còn trống"
\ No newline at end of file
+    return True, "Ghế còn trống"
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from api.models import Booking, Ticket
+from services import inventory
+
+
+def sweep_expired_bookings(batch_size=None, now=None):
+    """Hủy các booking pending đã hết hạn theo từng lô.
+
+    Mỗi lô là một transaction: khóa tối đa batch_size booking (bỏ qua các
+    booking đang bị transaction khác giữ: PaymentCreateSerializer khóa
+    booking trước khi thanh toán), hủy chúng bằng một câu UPDATE và nhả
+    toàn bộ ticket. Trả về số booking đã hủy.
+    """
+    batch_size = batch_size or getattr(settings, "BOOKING_EXPIRY_BATCH_SIZE", 500)
+    now = now or timezone.now()
+    swept = 0
+
+    while True:
+        with transaction.atomic():
+            booking_ids = list(
+                Booking.objects.filter(status=Booking.PENDING, expires_at__lt=now)
+                .order_by("expires_at")
+                .select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not booking_ids:
+                break
+
+            _cancel(booking_ids)
+
+        swept += len(booking_ids)
+        if len(booking_ids) < batch_size:
+            break
+
+    return swept
+
+
+def expire_bookings(booking_ids, now=None):
+    """Hủy ngay các booking pending đã hết hạn trong booking_ids (vd. khi giữ
+    chỗ đè lên vé hết hạn, không chờ sweeper). Trả về số ticket đã nhả."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        booking_ids = list(
+            Booking.objects.filter(
+                id__in=booking_ids, status=Booking.PENDING, expires_at__lt=now
+            )
+            .order_by("expires_at")
+            .select_for_update()
+            .values_list("id", flat=True)
+        )
+        if not booking_ids:
+            return 0
+        return _cancel(booking_ids)
+
+
+def _cancel(booking_ids):
+    """Hủy các booking (đã khóa) bằng một câu UPDATE và nhả toàn bộ ticket"""
+    Booking.objects.filter(id__in=booking_ids).update(status=Booking.CANCELED)
+    return inventory.transition_tickets(
+        Ticket.objects.filter(booking_id__in=booking_ids),
+        Ticket.CANCELED,
+        "expiry",
+    )
@@ -0,0 +1,44 @@
+"""Cache tên thể loại phim trong process.
+
+Danh sách phim chỉ prefetch bảng liên kết MovieGenre (movie_id, genre_id),
+tên thể loại lấy từ cache này thay vì join bảng Genre cho mỗi trang. Cache
+được làm mới khi GenreViewSet ghi (trong process hiện tại), khi gặp genre_id
+chưa có trong cache, và sau CACHE_TTL giây (cho các process khác).
+"""
+import threading
+import time
+
+from api.models import Genre
+
+CACHE_TTL = 300
+
+_cache = {"names": None, "loaded_at": 0.0}
+_lock = threading.Lock()
+
+
+def _load():
+    names = dict(Genre.objects.values_list("id", "name"))
+    with _lock:
+        _cache["names"], _cache["loaded_at"] = names, time.monotonic()
+    return names
+
+
+def get_names():
+    """genre_id -> tên thể loại"""
+    names = _cache["names"]
+    if names is None or time.monotonic() - _cache["loaded_at"] > CACHE_TTL:
+        names = _load()
+    return names
+
+
+def names_for(genre_ids):
+    """Tên các thể loại theo thứ tự tên; nạp lại cache một lần nếu thiếu id"""
+    names = get_names()
+    if any(genre_id not in names for genre_id in genre_ids):
+        names = _load()
+    return sorted(names[genre_id] for genre_id in genre_ids if genre_id in names)
+
+
+def invalidate():
+    with _lock:
+        _cache["names"] = None
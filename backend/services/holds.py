@@ -0,0 +1,134 @@
+"""Giữ chỗ: tạo booking và vé giữ chỗ trong một transaction.
+
+Ghế không bị bán trùng nhờ unique index một phần trên Ticket (showtime,
+seat) với các vé còn hiệu lực, nên không cần truy vấn kiểm tra trước: vé
+được insert thẳng, gặp IntegrityError mới tìm ghế bị trùng. Có thể khóa
+thêm theo BOOKING_LOCK_STRATEGY để các lượt giữ chỗ xếp hàng thay vì va
+chạm ở index:
+- "none": chỉ dựa vào unique index.
+- "row": SELECT ... FOR UPDATE trên dòng ShowtimeInventory của suất chiếu,
+  mọi lượt giữ chỗ cùng suất chiếu chạy tuần tự.
+- "seat": Postgres advisory lock theo từng (suất chiếu, ghế).
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from api.models import Booking, Seat, ShowtimeInventory, Ticket
+from services import expiry, inventory, locks
+
+LOCK_STRATEGIES = ("none", "row", "seat")
+DEFAULT_LOCK_STRATEGY = "none"
+
+
+class SeatsUnavailable(Exception):
+    """Một số ghế đã có người giữ/mua"""
+
+    def __init__(self, seats):
+        self.seats = seats  # [{"id", "label"}]
+        super().__init__(
+            "Ghế đã được đặt: " + ", ".join(seat["label"] for seat in seats)
+        )
+
+
+def get_lock_strategy():
+    strategy = getattr(settings, "BOOKING_LOCK_STRATEGY", DEFAULT_LOCK_STRATEGY)
+    if strategy not in LOCK_STRATEGIES:
+        raise ValueError(f"BOOKING_LOCK_STRATEGY không hợp lệ: {strategy}")
+    return strategy
+
+
+def lock_seats(showtime, seat_ids, strategy=None):
+    """Khóa suất chiếu hoặc từng ghế đến hết transaction hiện tại"""
+    strategy = strategy or get_lock_strategy()
+    if strategy == "none":
+        return
+    if strategy == "seat":
+        locks.advisory_xact_lock(
+            *(f"seat:{showtime.id}:{seat_id}" for seat_id in seat_ids)
+        )
+    else:
+        inventory.ensure_inventory(showtime)
+        list(
+            ShowtimeInventory.objects.select_for_update()
+            .filter(showtime_id=showtime.id)
+            .values_list("pk", flat=True)
+        )
+
+
+def find_conflicts(showtime, seat_ids):
+    """Các ghế trong seat_ids đang có vé còn hiệu lực"""
+    taken = (
+        Ticket.objects.filter(showtime=showtime, seat_id__in=seat_ids)
+        .active()
+        .order_by("seat__row_label", "seat__seat_number")
+        .values_list("seat_id", "seat__row_label", "seat__seat_number")
+    )
+    return [
+        {"id": str(seat_id), "label": f"{row_label}{seat_number}"}
+        for seat_id, row_label, seat_number in taken
+    ]
+
+
+def release_expired_holds(showtime, seat_ids):
+    """Hủy các booking quá hạn đang giữ những ghế này (cùng transaction, không
+    để booking pending chờ sweeper), trả về số vé đã nhả"""
+    booking_ids = set(
+        Ticket.objects.filter(showtime=showtime, seat_id__in=seat_ids)
+        .expired_holds()
+        .values_list("booking_id", flat=True)
+    )
+    if not booking_ids:
+        return 0
+    return expiry.expire_bookings(booking_ids)
+
+
+def hold_seats(user, showtime, seat_ids, lock_strategy=None):
+    """Tạo booking pending và vé giữ chỗ cho các ghế; raise SeatsUnavailable
+    (kèm danh sách ghế bị trùng) nếu có ghế đã bị chiếm."""
+    seat_ids = list(seat_ids)
+    seats = list(Seat.objects.filter(id__in=seat_ids).values_list("id", "seat_type"))
+    prices = {
+        seat_id: showtime.base_price
+        * Decimal(str(Seat.PRICE_MULTIPLIER.get(seat_type, 1.0)))
+        for seat_id, seat_type in seats
+    }
+
+    with transaction.atomic():
+        lock_seats(showtime, seat_ids, lock_strategy)
+
+        for attempt in range(2):
+            try:
+                return _insert_hold(user, showtime, prices)
+            except IntegrityError:
+                # Vé giữ chỗ quá hạn chưa bị hủy vẫn chiếm unique index:
+                # hủy chúng rồi thử lại một lần
+                if attempt or not release_expired_holds(showtime, seat_ids):
+                    break
+
+        raise SeatsUnavailable(find_conflicts(showtime, seat_ids))
+
+
+def _insert_hold(user, showtime, prices):
+    """Insert booking + vé trong savepoint riêng để có thể thử lại"""
+    with transaction.atomic():
+        seat_version = inventory.record_new_tickets(showtime.id, list(prices))
+        booking = Booking.objects.create(
+            user=user,
+            showtime=showtime,
+            status="pending",
+            total_amount=sum(prices.values()),
+        )
+        # bulk_create bỏ qua Ticket.save nên giá vé được tính sẵn
+        Ticket.objects.bulk_create(
+            Ticket(
+                booking=booking,
+                showtime=showtime,
+                seat_id=seat_id,
+                price=price,
+                status=Ticket.RESERVED,
+                seat_version=seat_version,
+            )
+            for seat_id, price in prices.items()
+        )
+        return booking
@@ -0,0 +1,83 @@
+"""Idempotency-Key cho các request POST tạo booking/payment.
+
+Request đầu tiên với một key được xử lý bình thường, response được lưu lại;
+các lần gửi lại cùng key chỉ đọc response đã lưu, không chạm tới bảng ghế
+hay thanh toán. Key hết hạn sau IDEMPOTENCY_KEY_TTL_HOURS và được sweeper
+dọn (purge_expired_keys).
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from api.models import IdempotencyKey
+
+DEFAULT_TTL_HOURS = 24
+
+
+def fingerprint(request):
+    """sha256 của method + path + body (JSON đã chuẩn hóa thứ tự key)"""
+    try:
+        body = json.dumps(request.data, sort_keys=True, default=str)
+    except TypeError:
+        body = repr(request.data)
+    payload = f"{request.method}\n{request.path}\n{body}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim(user, key, request_hash):
+    """Đăng ký key cho request hiện tại.
+
+    Trả về (record, created): created=False nghĩa là key đã được dùng và
+    record chứa response đã lưu (hoặc chưa có nếu request trước đang chạy).
+    """
+    now = timezone.now()
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is not None:
+        if record.expires_at > now:
+            return record, False
+        # Key đã hết hạn nhưng chưa bị dọn coi như chưa từng dùng
+        record.delete()
+
+    ttl = timedelta(
+        hours=getattr(settings, "IDEMPOTENCY_KEY_TTL_HOURS", DEFAULT_TTL_HOURS)
+    )
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user, key=key, request_hash=request_hash, expires_at=now + ttl
+            )
+        return record, True
+    except IntegrityError:
+        # Request khác cùng key vừa đăng ký trước
+        return IdempotencyKey.objects.get(user=user, key=key), False
+
+
+def complete(record, response):
+    """Lưu response của request đầu tiên"""
+    record.response_status = response.status_code
+    record.response_body = json.loads(json.dumps(response.data, default=str))
+    record.save(update_fields=["response_status", "response_body"])
+
+
+def release(record):
+    """Bỏ key khi request lỗi để client có thể gửi lại"""
+    IdempotencyKey.objects.filter(pk=record.pk).delete()
+
+
+def purge_expired_keys(batch_size=None, now=None):
+    """Xóa các key đã hết hạn, trả về số key đã xóa"""
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, "BOOKING_EXPIRY_BATCH_SIZE", 500)
+    purged = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now).values_list(
+                "pk", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return purged
+        purged += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
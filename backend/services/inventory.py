@@ -0,0 +1,133 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+from api.models import Showtime, ShowtimeInventory, Ticket
+from services import seat_events
+
+# Trạng thái ticket -> cột đếm tương ứng trong ShowtimeInventory
+COUNTER_FIELDS = {
+    Ticket.RESERVED: "reserved_count",
+    Ticket.PAID: "paid_count",
+    Ticket.CHECKED_IN: "checked_in_count",
+}
+
+
+def count_inventory(showtime_id):
+    """Đếm lại số ghế của suất chiếu trực tiếp từ bảng Seat/Ticket"""
+    showtime = Showtime.objects.select_related("auditorium").get(id=showtime_id)
+    counts = Ticket.objects.filter(showtime_id=showtime_id).aggregate(
+        seat_version=Max("seat_version"),
+        **{
+            field: Count("id", filter=Q(status=ticket_status))
+            for ticket_status, field in COUNTER_FIELDS.items()
+        },
+    )
+    counts["seat_version"] = counts["seat_version"] or 0
+    counts["total_seats"] = showtime.auditorium.seats.count()
+    return counts
+
+
+def rebuild_inventory(showtime_id):
+    """Tính lại toàn bộ bộ đếm cho một suất chiếu"""
+    counts = count_inventory(showtime_id)
+    inventory, _ = ShowtimeInventory.objects.update_or_create(
+        showtime_id=showtime_id, defaults=counts
+    )
+    return inventory
+
+
+def ensure_inventory(showtime):
+    """Tạo bộ đếm cho suất chiếu nếu chưa có"""
+    try:
+        return showtime.inventory
+    except ShowtimeInventory.DoesNotExist:
+        return rebuild_inventory(showtime.id)
+
+
+def apply_deltas(showtime_id, deltas, tickets_written=False):
+    """Cộng/trừ bộ đếm theo {status: số lượng thay đổi} và tăng seat_version.
+
+    Gọi trước khi ghi ticket trong cùng transaction (hoặc sau, với
+    tickets_written=True); trả về seat_version mới để gán cho các ticket vừa
+    thay đổi.
+    """
+    changes = {
+        COUNTER_FIELDS[ticket_status]: F(COUNTER_FIELDS[ticket_status]) + delta
+        for ticket_status, delta in deltas.items()
+        if ticket_status in COUNTER_FIELDS and delta
+    }
+    inventories = ShowtimeInventory.objects.filter(showtime_id=showtime_id)
+
+    updated = inventories.update(
+        updated_at=timezone.now(), seat_version=F("seat_version") + 1, **changes
+    )
+    if not updated:
+        # Suất chiếu cũ chưa có bộ đếm: đếm lại từ ticket; nếu ticket chưa
+        # được ghi thì số đếm là trạng thái trước thay đổi, cộng thêm delta
+        rebuild_inventory(showtime_id)
+        inventories.update(
+            updated_at=timezone.now(),
+            seat_version=F("seat_version") + 1,
+            **({} if tickets_written else changes),
+        )
+
+    return inventories.values_list("seat_version", flat=True).get()
+
+
+def record_new_tickets(showtime_id, seat_ids, ticket_status=Ticket.RESERVED):
+    """Ghi nhận vé sắp tạo cho suất chiếu, trả về seat_version cho các vé đó"""
+    seat_version = apply_deltas(showtime_id, {ticket_status: len(seat_ids)})
+    seat_events.publish_seat_event(
+        showtime_id, seat_events.EVENT_TYPES[ticket_status], seat_ids, seat_version
+    )
+    return seat_version
+
+
+def transition_tickets(tickets, to_status, event_type=None):
+    """Chuyển trạng thái một tập ticket và cập nhật bộ đếm trong cùng transaction.
+
+    event_type ghi đè loại sự kiện gửi cho client (vd. "expiry").
+    Trả về số ticket đã chuyển trạng thái.
+    """
+    event_type = event_type or seat_events.EVENT_TYPES[to_status]
+
+    with transaction.atomic():
+        rows = list(
+            tickets.exclude(status=to_status)
+            .select_for_update()
+            .values_list("id", "showtime_id", "status", "seat_id")
+        )
+        if not rows:
+            return 0
+
+        by_showtime = defaultdict(list)
+        for row in rows:
+            by_showtime[row[1]].append(row)
+
+        for showtime_id, showtime_rows in by_showtime.items():
+            deltas = Counter()
+            for _, _, from_status, _ in showtime_rows:
+                deltas[from_status] -= 1
+                deltas[to_status] += 1
+
+            seat_version = apply_deltas(showtime_id, deltas)
+            Ticket.objects.filter(id__in=[row[0] for row in showtime_rows]).update(
+                status=to_status, seat_version=seat_version
+            )
+            seat_events.publish_seat_event(
+                showtime_id,
+                event_type,
+                [row[3] for row in showtime_rows],
+                seat_version,
+            )
+
+        return len(rows)
+
+
+def refresh_auditorium_totals(auditorium):
+    """Cập nhật tổng số ghế cho các suất chiếu của phòng sau khi tạo lại ghế"""
+    return ShowtimeInventory.objects.filter(
+        showtime__auditorium=auditorium
+    ).update(total_seats=auditorium.seats.count())
@@ -0,0 +1,53 @@
+"""Khóa dùng chung giữa các process (Postgres advisory lock).
+
+Với DB khác Postgres (vd. SQLite khi chạy thử) các hàm ở đây không khóa gì
+và luôn coi như lấy được khóa.
+"""
+import hashlib
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+def lock_key(name):
+    """Đổi tên khóa -> số nguyên 64 bit có dấu cho pg_advisory_lock"""
+    digest = hashlib.blake2b(str(name).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(name, wait=True, using="default"):
+    """Khóa mức session; yield True nếu lấy được khóa"""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        yield True
+        return
+
+    key = lock_key(name)
+    with connection.cursor() as cursor:
+        if wait:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [key])
+            acquired = True
+        else:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+            acquired = cursor.fetchone()[0]
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
+
+
+def advisory_xact_lock(*names, using="default"):
+    """Khóa đến hết transaction hiện tại (phải gọi trong transaction.atomic)"""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+
+    # Khóa theo thứ tự cố định để tránh deadlock giữa các transaction
+    keys = sorted({lock_key(name) for name in names})
+    with connection.cursor() as cursor:
+        for key in keys:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
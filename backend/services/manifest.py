@@ -0,0 +1,104 @@
+"""Danh sách vé cho cổng soát vé chạy offline.
+
+Manifest dạng cột (ticket_ids / seats / statuses cùng thứ tự) được nén gzip,
+và có thể tải phần thay đổi kể từ một seat_version (since). Check-in ghi
+nhận offline được gửi lên theo lô và áp dụng bằng một lần chuyển trạng thái.
+"""
+import gzip
+import json
+
+from api.models import ShowtimeInventory, Ticket
+from services import inventory, seat_map
+
+# Trạng thái ticket -> mã một ký tự trong manifest
+STATUS_CODES = {
+    Ticket.RESERVED: "r",
+    Ticket.PAID: "p",
+    Ticket.CHECKED_IN: "c",
+    Ticket.CANCELED: "x",
+    Ticket.REFUNDED: "x",
+}
+
+# Bản đầy đủ chỉ gồm vé vào cổng được
+VALID_STATUSES = [Ticket.PAID, Ticket.CHECKED_IN]
+
+MAX_CHECK_IN_BATCH = 1000
+
+
+def build(showtime, since=None):
+    """Manifest của suất chiếu; since=None trả về bản đầy đủ"""
+    seat_inventory = inventory.ensure_inventory(showtime)
+    layout = seat_map.get_layout(showtime.auditorium)
+
+    tickets = Ticket.objects.filter(showtime=showtime)
+    if since is None:
+        tickets = tickets.filter(status__in=VALID_STATUSES)
+    else:
+        # Gồm cả vé bị hủy/hoàn tiền để cổng gỡ khỏi danh sách
+        tickets = tickets.filter(seat_version__gt=since)
+    rows = tickets.order_by("seat_version").values_list("id", "seat_id", "status")
+
+    ticket_ids, seats, statuses = [], [], []
+    for ticket_id, seat_id, ticket_status in rows:
+        i = layout.index.get(str(seat_id))
+        ticket_ids.append(ticket_id.hex)
+        seats.append(layout.label(i) if i is not None else "")
+        statuses.append(STATUS_CODES[ticket_status])
+
+    return {
+        "showtime_id": str(showtime.id),
+        "seat_version": seat_inventory.seat_version,
+        "since": since,
+        "status_codes": {"p": "paid", "c": "checked_in", "r": "reserved", "x": "void"},
+        "ticket_ids": ticket_ids,
+        "seats": seats,
+        "statuses": "".join(statuses),
+    }
+
+
+def compress(manifest):
+    return gzip.compress(
+        json.dumps(manifest, separators=(",", ":")).encode(), compresslevel=6
+    )
+
+
+def apply_check_ins(showtime, ticket_ids):
+    """Check-in theo lô các vé đã quét offline.
+
+    Trả về dict: checked_in (số vé vừa check-in), already_checked_in,
+    rejected (vé không tồn tại / chưa thanh toán / đã hủy) và seat_version.
+    """
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    statuses = dict(
+        Ticket.objects.filter(showtime=showtime, id__in=ticket_ids).values_list(
+            "id", "status"
+        )
+    )
+
+    paid, already_checked_in, rejected = [], [], []
+    for ticket_id in ticket_ids:
+        ticket_status = statuses.get(ticket_id)
+        if ticket_status == Ticket.PAID:
+            paid.append(ticket_id)
+        elif ticket_status == Ticket.CHECKED_IN:
+            already_checked_in.append(str(ticket_id))
+        else:
+            rejected.append(str(ticket_id))
+
+    # Điều kiện status = paid được kiểm tra lại khi khóa dòng
+    checked_in = 0
+    if paid:
+        checked_in = inventory.transition_tickets(
+            Ticket.objects.filter(id__in=paid, status=Ticket.PAID),
+            Ticket.CHECKED_IN,
+        )
+
+    return {
+        "checked_in": checked_in,
+        "already_checked_in": already_checked_in,
+        "rejected": rejected,
+        # Gộp vào lần tải manifest tiếp theo bằng since=seat_version
+        "seat_version": ShowtimeInventory.objects.filter(showtime_id=showtime.id)
+        .values_list("seat_version", flat=True)
+        .first(),
+    }
@@ -0,0 +1,211 @@
+"""Tìm kiếm phim không dấu, có xếp hạng và gợi ý theo tiền tố.
+
+Movie.search_text chứa tiêu đề + mô tả đã bỏ dấu (cập nhật trong save()),
+nên "dat rung" tìm được "Đất rừng phương Nam". Có hai backend:
+
+- Postgres: lọc search_text LIKE '%từ%' cho từng từ hoặc gần đúng bằng
+  toán tử trigram (%>), cả hai dùng GIN index pg_trgm trong schema.sql;
+  xếp hạng bằng word_similarity và ưu tiên khớp đầu tiêu đề.
+- DB khác (vd. SQLite khi chạy thử): index trong bộ nhớ (MovieIndex).
+
+Gợi ý (autocomplete) luôn dùng MovieIndex: danh sách từ của tiêu đề đã sắp
+xếp, tìm tiền tố bằng bisect nên không cần truy vấn DB. Index được nạp lại
+khi MovieViewSet ghi (trong process hiện tại) và sau INDEX_TTL giây.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from api.models import Movie
+from api.models.movie import normalize_search_text
+
+INDEX_TTL = 300
+# Số kết quả tối đa xếp hạng bằng index trong bộ nhớ
+MAX_RESULTS = 1000
+# Ngưỡng tương đồng trigram cho từ gõ sai (index trong bộ nhớ): tỉ lệ
+# trigram của từ gõ vào có trong từ của index, tương tự word_similarity
+FUZZY_THRESHOLD = 0.5
+
+_index = {"index": None, "loaded_at": 0.0}
+_lock = threading.Lock()
+
+
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class MovieIndex:
+    """Index từ -> phim trong bộ nhớ"""
+
+    def __init__(self, rows):
+        """rows: (id, title, search_text)"""
+        self.titles = {}
+        self.title_words = {}  # id -> từ trong tiêu đề
+        self.postings = {}  # từ -> {id}
+        title_entries = []
+        for movie_id, title, search_text in rows:
+            title_text, _, description_text = search_text.partition("\n")
+            self.titles[movie_id] = (title, title_text)
+            words = title_text.split()
+            self.title_words[movie_id] = set(words)
+            for word in set(words) | set(description_text.split()):
+                self.postings.setdefault(word, set()).add(movie_id)
+            title_entries.extend((word, movie_id) for word in set(words))
+        self.words = sorted(self.postings)
+        self.title_entries = sorted(title_entries)
+        self._word_trigrams = None
+
+    def _prefix_range(self, items, prefix):
+        start = bisect_left(items, prefix)
+        end = bisect_left(items, prefix + "\uffff", start)
+        return start, end
+
+    def _fuzzy_words(self, term):
+        """Các từ gần giống term (gõ sai chính tả) theo độ tương đồng trigram"""
+        if self._word_trigrams is None:
+            self._word_trigrams = [(word, _trigrams(word)) for word in self.words]
+        term_trigrams = _trigrams(term)
+        return [
+            word
+            for word, word_trigrams in self._word_trigrams
+            if len(term_trigrams & word_trigrams) / len(term_trigrams) >= FUZZY_THRESHOLD
+        ]
+
+    def search(self, query):
+        """[(movie_id, điểm)] xếp theo điểm giảm dần; mọi từ phải khớp
+        (khớp tiền tố, hoặc gần đúng nếu không có từ nào khớp tiền tố)"""
+        terms = normalize_search_text(query).split()
+        if not terms:
+            return []
+
+        scores = None
+        for term in terms:
+            start, end = self._prefix_range(self.words, term)
+            words = self.words[start:end] or self._fuzzy_words(term)
+            term_scores = {}
+            for word in words:
+                # Khớp nguyên từ > khớp tiền tố > gần đúng; từ trong tiêu đề x2
+                weight = 1.0 if word == term else 0.6 if word.startswith(term) else 0.3
+                for movie_id in self.postings[word]:
+                    score = weight * (2 if word in self.title_words[movie_id] else 1)
+                    if score > term_scores.get(movie_id, 0):
+                        term_scores[movie_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    movie_id: score + term_scores[movie_id]
+                    for movie_id, score in scores.items()
+                    if movie_id in term_scores
+                }
+            if not scores:
+                return []
+
+        phrase = " ".join(terms)
+        for movie_id in scores:
+            if self.titles[movie_id][1].startswith(phrase):
+                scores[movie_id] += 2
+        ranked = sorted(
+            scores.items(), key=lambda item: (-item[1], self.titles[item[0]][0])
+        )
+        return ranked[:MAX_RESULTS]
+
+    def autocomplete(self, prefix, limit=10):
+        """[(movie_id, tiêu đề)]: tiêu đề bắt đầu bằng prefix trước, sau đó
+        tiêu đề có một từ bắt đầu bằng từ cuối của prefix"""
+        terms = normalize_search_text(prefix).split()
+        if not terms:
+            return []
+        phrase, last = " ".join(terms), terms[-1]
+
+        start = bisect_left(self.title_entries, (last,))
+        end = bisect_left(self.title_entries, (last + "\uffff",), start)
+        matches = []
+        seen = set()
+        for _, movie_id in self.title_entries[start:end]:
+            if movie_id in seen:
+                continue
+            seen.add(movie_id)
+            title, title_text = self.titles[movie_id]
+            # Các từ trước từ cuối phải có trong tiêu đề
+            if any(term not in self.title_words[movie_id] for term in terms[:-1]):
+                continue
+            matches.append((not title_text.startswith(phrase), title, movie_id))
+        matches.sort()
+        return [(movie_id, title) for _, title, movie_id in matches[:limit]]
+
+
+def get_index():
+    index = _index["index"]
+    if index is None or time.monotonic() - _index["loaded_at"] > INDEX_TTL:
+        index = MovieIndex(Movie.objects.values_list("id", "title", "search_text"))
+        with _lock:
+            _index["index"], _index["loaded_at"] = index, time.monotonic()
+    return index
+
+
+def invalidate():
+    with _lock:
+        _index["index"] = None
+
+
+def _use_database(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def search(queryset, query, ordered=True):
+    """Lọc queryset theo query, annotate search_rank; ordered=True thì xếp
+    theo độ liên quan"""
+    normalized = normalize_search_text(query)
+    if not normalized:
+        return queryset
+
+    if _use_database(queryset):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        all_terms = Q()
+        for term in normalized.split():
+            all_terms &= Q(search_text__contains=term)
+        queryset = queryset.filter(
+            all_terms | Q(search_text__trigram_word_similar=normalized)
+        ).annotate(
+            search_rank=TrigramWordSimilarity(normalized, "search_text")
+            + Case(
+                When(search_text__startswith=normalized, then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+    else:
+        ranked = get_index().search(query)
+        queryset = queryset.filter(id__in=[movie_id for movie_id, _ in ranked])
+        queryset = queryset.annotate(
+            search_rank=Case(
+                *(When(id=movie_id, then=Value(score)) for movie_id, score in ranked),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+
+    if ordered:
+        queryset = queryset.order_by("-search_rank", "title")
+    return queryset
+
+
+def reindex(batch_size=500):
+    """Tính lại search_text cho mọi phim (vd. sau khi nhập dữ liệu bằng SQL)"""
+    updated = 0
+    batch = []
+    for movie in Movie.objects.only("id", "title", "description").iterator():
+        movie.search_text = movie.build_search_text()
+        batch.append(movie)
+        if len(batch) >= batch_size:
+            updated += Movie.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    if batch:
+        updated += Movie.objects.bulk_update(batch, ["search_text"])
+    invalidate()
+    return updated
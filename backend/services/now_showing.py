@@ -0,0 +1,96 @@
+"""Tập phim đang chiếu / sắp chiếu, cache trong process.
+
+Danh sách phim cho khách chỉ gồm phim còn suất chiếu chưa bắt đầu. Thay vì
+EXISTS trên bảng Showtime ở mỗi request, tập id phim được tính bằng một truy
+vấn gộp theo phim và giữ trong cache đến khi:
+
+- một phim hết suất chiếu sắp tới (suất cuối cùng của nó bắt đầu),
+- sang ngày mới (phim sắp chiếu tới ngày khởi chiếu),
+- suất chiếu / phim được tạo, sửa, xóa trong process này (invalidate),
+- hoặc quá CACHE_TTL giây (ghi từ process khác).
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.db.models import Max, Min
+from django.utils import timezone
+from api.models import Showtime
+
+CACHE_TTL = 60
+
+NOW_SHOWING = "now_showing"
+COMING_SOON = "coming_soon"
+
+
+@dataclass(frozen=True)
+class ShowingSets:
+    now_showing: frozenset
+    coming_soon: frozenset
+    expires_at: datetime  # thời điểm tập phim thay đổi theo thời gian
+    loaded_at: float
+
+    @property
+    def all(self):
+        return self.now_showing | self.coming_soon
+
+
+_cache = {"sets": None}
+_lock = threading.Lock()
+
+
+def _load(now):
+    today = timezone.localdate(now)
+    rows = (
+        Showtime.objects.filter(status=Showtime.SCHEDULED, start_time__gte=now)
+        .values("movie_id", "movie__release_date")
+        .annotate(first_start=Min("start_time"), last_start=Max("start_time"))
+        .order_by()
+    )
+
+    now_showing, coming_soon = set(), set()
+    # Sang ngày mới thì phim sắp chiếu có thể thành đang chiếu
+    expires_at = timezone.make_aware(
+        datetime.combine(today + timedelta(days=1), datetime.min.time())
+    )
+    for row in rows:
+        release_date = row["movie__release_date"]
+        if release_date is not None and release_date > today:
+            coming_soon.add(row["movie_id"])
+        else:
+            now_showing.add(row["movie_id"])
+        expires_at = min(expires_at, row["last_start"])
+
+    return ShowingSets(
+        frozenset(now_showing), frozenset(coming_soon), expires_at, time.monotonic()
+    )
+
+
+def get_sets(now=None):
+    now = now or timezone.now()
+    sets = _cache["sets"]
+    if (
+        sets is None
+        or now >= sets.expires_at
+        or time.monotonic() - sets.loaded_at > CACHE_TTL
+    ):
+        sets = _load(now)
+        with _lock:
+            _cache["sets"] = sets
+    return sets
+
+
+def movie_ids(section=None):
+    """Id các phim còn suất chiếu; section: NOW_SHOWING / COMING_SOON / None (cả hai)"""
+    sets = get_sets()
+    if section == NOW_SHOWING:
+        return sets.now_showing
+    if section == COMING_SOON:
+        return sets.coming_soon
+    return sets.all
+
+
+def invalidate():
+    with _lock:
+        _cache["sets"] = None
@@ -0,0 +1,346 @@
+"""Xếp lịch suất chiếu theo lô.
+
+Mỗi phòng chiếu có một IntervalIndex: các khoảng [start, end) đã sắp xếp
+và không chồng nhau, nên kiểm tra trùng lịch chỉ cần một lần bisect thay vì
+một truy vấn cho mỗi suất chiếu. DB vẫn có exclusion constraint trên
+tstzrange(start_time, end_time) theo phòng để chặn trùng lịch khi nhiều
+request chạy đồng thời.
+
+advance_statuses (job nền của run_sweeper) chuyển trạng thái suất chiếu
+scheduled -> showing -> finished theo giờ chiếu.
+"""
+import heapq
+import logging
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+from api.models import Seat, Showtime, ShowtimeInventory
+from services import locks, now_showing
+
+# Thời gian dọn phòng sau mỗi suất chiếu
+CLEANUP_BUFFER = timedelta(minutes=30)
+
+MAX_BATCH = 500
+
+# Giờ bắt đầu suất chiếu tự xếp được làm tròn lên bội số này
+START_GRANULARITY = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleConflict(Exception):
+    """Suất chiếu bị trùng lịch với suất chiếu khác trong cùng phòng"""
+
+
+def end_time_for(movie, start_time):
+    """Giờ kết thúc = giờ bắt đầu + thời lượng phim + thời gian dọn phòng"""
+    return start_time + timedelta(minutes=movie.duration_min) + CLEANUP_BUFFER
+
+
+class IntervalIndex:
+    """Các khoảng [start, end) không chồng nhau của một phòng, sắp theo start"""
+
+    __slots__ = ("starts", "intervals")
+
+    def __init__(self):
+        self.starts = []
+        self.intervals = []  # (start, end, label)
+
+    def conflict(self, start, end):
+        """Khoảng đang có chồng lên [start, end), hoặc None"""
+        # Khoảng có start lớn nhất < end là ứng viên duy nhất: các khoảng
+        # trước nó đều kết thúc trước khi nó bắt đầu
+        i = bisect_left(self.starts, end)
+        if i and self.intervals[i - 1][1] > start:
+            return self.intervals[i - 1]
+        return None
+
+    def add(self, start, end, label=None):
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.intervals.insert(i, (start, end, label))
+
+    def free_gaps(self, day_start, day_end):
+        """Các khoảng trống trong [day_start, day_end)"""
+        cursor = day_start
+        i = bisect_left(self.starts, day_start)
+        if i and self.intervals[i - 1][1] > cursor:
+            cursor = self.intervals[i - 1][1]
+        for start, end, _ in self.intervals[i:]:
+            if start >= day_end:
+                break
+            if start > cursor:
+                yield cursor, start
+            cursor = max(cursor, end)
+        if cursor < day_end:
+            yield cursor, day_end
+
+
+def load_indexes(auditorium_ids, window_start, window_end, exclude_ids=()):
+    """IntervalIndex cho từng phòng từ các suất chiếu đã có trong khoảng thời gian"""
+    indexes = {auditorium_id: IntervalIndex() for auditorium_id in auditorium_ids}
+    existing = (
+        Showtime.objects.filter(
+            auditorium_id__in=indexes,
+            start_time__lt=window_end,
+            end_time__gt=window_start,
+        )
+        .exclude(id__in=exclude_ids)
+        .values_list("auditorium_id", "start_time", "end_time", "movie__title")
+    )
+    for auditorium_id, start_time, end_time, title in existing:
+        indexes[auditorium_id].add(start_time, end_time, title)
+    return indexes
+
+
+def find_conflicts(items):
+    """Kiểm tra trùng lịch cho một lô suất chiếu (với DB và với nhau).
+
+    items: danh sách dict có movie, auditorium, start_time. Trả về danh sách
+    (vị trí trong lô, thông báo lỗi).
+    """
+    if not items:
+        return []
+    ends = [end_time_for(item["movie"], item["start_time"]) for item in items]
+    indexes = load_indexes(
+        {item["auditorium"].id for item in items},
+        min(item["start_time"] for item in items),
+        max(ends),
+    )
+
+    conflicts = []
+    # Xếp theo thời gian để lỗi báo về suất chiếu đến sau
+    for i in sorted(range(len(items)), key=lambda i: items[i]["start_time"]):
+        item, end_time = items[i], ends[i]
+        index = indexes[item["auditorium"].id]
+        overlap = index.conflict(item["start_time"], end_time)
+        if overlap is not None:
+            start, end, label = overlap
+            start, end = timezone.localtime(start), timezone.localtime(end)
+            conflicts.append(
+                (
+                    i,
+                    f"Trùng lịch với suất chiếu '{label}' "
+                    f"từ {start:%d/%m %H:%M} đến {end:%H:%M} "
+                    f"tại {item['auditorium'].name}",
+                )
+            )
+            continue
+        index.add(item["start_time"], end_time, item["movie"].title)
+    return sorted(conflicts)
+
+
+def advance_statuses(now=None):
+    """Chuyển trạng thái suất chiếu theo giờ: scheduled -> showing -> finished.
+
+    Hai câu UPDATE theo tập, dùng index (status, start_time); trả về số suất
+    chiếu đã đổi trạng thái.
+    """
+    now = now or timezone.now()
+    finished = Showtime.objects.filter(
+        status__in=[Showtime.SCHEDULED, Showtime.SHOWING],
+        start_time__lte=now,
+        end_time__lte=now,
+    ).update(status=Showtime.FINISHED)
+    showing = Showtime.objects.filter(
+        status=Showtime.SCHEDULED, start_time__lte=now
+    ).update(status=Showtime.SHOWING)
+    if showing:
+        # Suất chiếu vừa bắt đầu không còn là "sắp tới"
+        now_showing.invalidate()
+    return finished + showing
+
+
+def bulk_schedule(items):
+    """Tạo tất cả suất chiếu trong một transaction; raise ScheduleConflict
+    nếu DB báo trùng lịch (suất chiếu khác vừa được tạo đồng thời)."""
+    auditorium_ids = {item["auditorium"].id for item in items}
+    seat_counts = dict(
+        Seat.objects.filter(auditorium_id__in=auditorium_ids)
+        .values("auditorium_id")
+        .annotate(count=Count("id"))
+        .values_list("auditorium_id", "count")
+    )
+
+    showtimes = [
+        Showtime(
+            movie=item["movie"],
+            auditorium=item["auditorium"],
+            start_time=item["start_time"],
+            end_time=end_time_for(item["movie"], item["start_time"]),
+            base_price=item["base_price"],
+        )
+        for item in items
+    ]
+    try:
+        with transaction.atomic():
+            # Các lô cùng phòng xếp hàng thay vì va nhau ở exclusion constraint
+            locks.advisory_xact_lock(
+                *(f"schedule:{auditorium_id}" for auditorium_id in auditorium_ids)
+            )
+            conflicts = find_conflicts(items)
+            if conflicts:
+                raise ScheduleConflict(conflicts)
+
+            Showtime.objects.bulk_create(showtimes)
+            ShowtimeInventory.objects.bulk_create(
+                ShowtimeInventory(
+                    showtime=showtime,
+                    total_seats=seat_counts.get(showtime.auditorium_id, 0),
+                )
+                for showtime in showtimes
+            )
+    except IntegrityError:
+        # Không trả chi tiết lỗi DB (tên constraint, SQL) cho client
+        logger.exception("bulk_schedule: DB từ chối lô suất chiếu")
+        raise ScheduleConflict(
+            [(None, "Trùng lịch với suất chiếu khác vừa được tạo trong cùng phòng")]
+        )
+    now_showing.invalidate()
+    return showtimes
+
+
+@dataclass
+class MovieTarget:
+    """Phim cần xếp: screens_per_day là số suất chiếu mong muốn mỗi ngày"""
+
+    movie: object
+    screens_per_day: int
+    base_price: object
+    placed: dict = field(default_factory=dict)  # ngày -> số suất đã xếp
+
+    @property
+    def slot(self):
+        return timedelta(minutes=self.movie.duration_min) + CLEANUP_BUFFER
+
+
+def _round_up(value):
+    """Làm tròn lên theo START_GRANULARITY (tính theo giờ địa phương)"""
+    local = timezone.localtime(value)
+    step = int(START_GRANULARITY.total_seconds())
+    seconds = local.minute * 60 + local.second + local.microsecond / 1e6
+    extra = -seconds % step
+    return value + timedelta(seconds=extra) if extra else value
+
+
+def opening_window(day, open_time, close_time):
+    """Giờ mở/đóng cửa của một ngày; close_time <= open_time nghĩa là qua nửa đêm"""
+    opens = timezone.make_aware(datetime.combine(day, open_time))
+    closes = timezone.make_aware(datetime.combine(day, close_time))
+    if close_time == time(0) or closes <= opens:
+        closes = timezone.make_aware(
+            datetime.combine(day + timedelta(days=1), close_time)
+        )
+    return opens, closes
+
+
+def _pick(targets, day, room):
+    """Phim vừa khoảng trống `room` và đang thiếu suất nhiều nhất so với mục
+    tiêu; hòa thì chọn phim dài hơn để lấp kín phòng"""
+    best, best_key = None, None
+    for target in targets:
+        if target.slot > room:
+            continue
+        key = (target.placed.get(day, 0) / target.screens_per_day, -target.slot)
+        if best_key is None or key < best_key:
+            best, best_key = target, key
+    return best
+
+
+def generate(targets, auditoriums, days, open_time, close_time, now=None):
+    """Xếp lịch tham lam cho nhiều phòng trong nhiều ngày.
+
+    Mỗi ngày, phòng nào rảnh sớm nhất (heap theo giờ rảnh) được xếp tiếp phim
+    đang thiếu suất nhiều nhất mà vừa khoảng trống hiện tại; không phim nào
+    vừa thì bỏ qua tới khoảng trống sau. Suất chiếu đã có trong DB được giữ
+    nguyên (chỉ xếp vào khoảng trống). Khi mọi phim đã đủ mục tiêu vẫn xếp
+    tiếp theo tỉ lệ mục tiêu để phòng không bỏ trống.
+
+    Trả về (items, stats): items dùng được ngay cho bulk_schedule.
+    """
+    now = now or timezone.now()
+    targets = [target for target in targets if target.screens_per_day > 0]
+    windows = {day: opening_window(day, open_time, close_time) for day in days}
+    indexes = load_indexes(
+        [auditorium.id for auditorium in auditoriums],
+        min(opens for opens, _ in windows.values()),
+        max(closes for _, closes in windows.values()),
+    )
+
+    items = []
+    scheduled = {auditorium.id: timedelta() for auditorium in auditoriums}
+    open_total = timedelta()
+    for day, (opens, closes) in windows.items():
+        start_from = max(opens, _round_up(now))
+        if start_from >= closes:
+            continue
+        open_total += closes - opens
+
+        heap = []
+        for order, auditorium in enumerate(auditoriums):
+            index = indexes[auditorium.id]
+            for start, end, _ in index.intervals:
+                if start < closes and end > opens:
+                    scheduled[auditorium.id] += min(end, closes) - max(start, opens)
+            gaps = list(index.free_gaps(start_from, closes))
+            if gaps:
+                heapq.heappush(heap, (_round_up(gaps[0][0]), order, 0, gaps))
+
+        while heap:
+            cursor, order, gap_index, gaps = heapq.heappop(heap)
+            auditorium = auditoriums[order]
+            gap_end = gaps[gap_index][1]
+            target = _pick(targets, day, gap_end - cursor) if targets else None
+            if target is None:
+                # Không phim nào vừa: chuyển sang khoảng trống tiếp theo
+                gap_index += 1
+                if gap_index < len(gaps):
+                    heapq.heappush(
+                        heap,
+                        (_round_up(gaps[gap_index][0]), order, gap_index, gaps),
+                    )
+                continue
+
+            end_time = cursor + target.slot
+            items.append(
+                {
+                    "movie": target.movie,
+                    "auditorium": auditorium,
+                    "start_time": cursor,
+                    "end_time": end_time,
+                    "base_price": target.base_price,
+                }
+            )
+            target.placed[day] = target.placed.get(day, 0) + 1
+            scheduled[auditorium.id] += target.slot
+            heapq.heappush(heap, (_round_up(end_time), order, gap_index, gaps))
+
+    stats = {
+        "showtimes": len(items),
+        "utilization": {
+            auditorium.name: (
+                round(scheduled[auditorium.id] / open_total, 4) if open_total else 0
+            )
+            for auditorium in auditoriums
+        },
+        "movies": [
+            {
+                "movie": str(target.movie.id),
+                "title": target.movie.title,
+                "target_per_day": target.screens_per_day,
+                "placed": sum(target.placed.values()),
+                "short_days": [
+                    str(day)
+                    for day in windows
+                    if windows[day][1] > max(windows[day][0], now)
+                    and target.placed.get(day, 0) < target.screens_per_day
+                ],
+            }
+            for target in targets
+        ],
+    }
+    return items, stats
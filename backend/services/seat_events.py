@@ -0,0 +1,269 @@
+"""Pub/sub sự kiện ghế theo suất chiếu (giữ chỗ, nhả ghế, thanh toán, hết hạn).
+
+Sự kiện được publish sau khi transaction commit. Mỗi sự kiện được encode
+một lần rồi đẩy vào queue của từng người đang xem suất chiếu trong process,
+nên hàng nghìn kết nối SSE chỉ tốn một lần fan-out thay vì hàng nghìn lượt
+polling vào DB. Có thể thay broker khác qua setting SEAT_EVENT_BROKER
+(dotted path tới class kế thừa SeatEventBroker).
+
+Broker mặc định là PostgresNotifyBroker: sự kiện đi qua NOTIFY của Postgres
+và mỗi process web có một thread LISTEN, nên sự kiện phát sinh ở process
+khác (vd. run_sweeper hủy booking hết hạn, hoặc nhiều worker ASGI) vẫn tới
+được người xem. InMemoryBroker chỉ đúng khi mọi thay đổi ghế xảy ra trong
+cùng một process.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+from api.models import Ticket
+
+# Trạng thái ticket mới -> loại sự kiện gửi cho client
+EVENT_TYPES = {
+    Ticket.RESERVED: "hold",
+    Ticket.PAID: "purchase",
+    Ticket.CHECKED_IN: "check_in",
+    Ticket.CANCELED: "release",
+    Ticket.REFUNDED: "release",
+}
+
+# Các sự kiện làm ghế bị chiếm
+BOOKED_EVENTS = {"hold", "purchase", "check_in"}
+
+DEFAULT_BROKER = "services.seat_events.PostgresNotifyBroker"
+
+logger = logging.getLogger(__name__)
+
+
+class SeatEventBroker:
+    """Giao diện broker: publish một sự kiện, subscribe theo suất chiếu"""
+
+    def publish(self, showtime_id, event):
+        raise NotImplementedError
+
+    def subscribe(self, showtime_id):
+        """Trả về Subscription; gọi trong event loop của kết nối"""
+        raise NotImplementedError
+
+
+class Subscription:
+    """Một kết nối đang nghe sự kiện của suất chiếu"""
+
+    def __init__(self, broker, showtime_id, max_pending):
+        self.broker = broker
+        self.showtime_id = showtime_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def push(self, message):
+        """Gọi từ thread bất kỳ"""
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Client đọc quá chậm: bỏ hàng đợi, báo client tải lại sơ đồ ghế
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(encode({"type": "resync"}))
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class InMemoryBroker(SeatEventBroker):
+    """Broker trong process, an toàn khi publish từ thread xử lý request sync"""
+
+    max_pending = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, showtime_id, event):
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(str(showtime_id), ()))
+        if not subscribers:
+            return 0
+
+        message = encode(event)
+        for subscription in subscribers:
+            subscription.push(message)
+        return len(subscribers)
+
+    def subscribe(self, showtime_id):
+        subscription = Subscription(self, str(showtime_id), self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(subscription.showtime_id, set()).add(
+                subscription
+            )
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.showtime_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.showtime_id]
+
+    def subscriber_count(self, showtime_id):
+        with self._lock:
+            return len(self._subscribers.get(str(showtime_id), ()))
+
+
+class PostgresNotifyBroker(InMemoryBroker):
+    """Broker dùng chung giữa các process qua LISTEN/NOTIFY của Postgres.
+
+    publish gửi NOTIFY (không giao trực tiếp); thread LISTEN của process
+    nhận lại mọi sự kiện, kể cả của chính nó, rồi đẩy cho người xem trong
+    process. Với DB không phải Postgres (vd. SQLite khi chạy thử) broker
+    hoạt động như InMemoryBroker.
+    """
+
+    channel = "seat_events"
+    # Payload NOTIFY tối đa 8000 byte: chia danh sách ghế theo lô
+    max_seats_per_notify = 100
+    poll_timeout = 5
+    reconnect_delay = 2
+
+    def __init__(self, using="default"):
+        super().__init__()
+        self.using = using
+        self._listener = None
+
+    @property
+    def _is_postgres(self):
+        return connections[self.using].vendor == "postgresql"
+
+    def publish(self, showtime_id, event):
+        if not self._is_postgres:
+            return super().publish(showtime_id, event)
+
+        seat_ids = event.get("seat_ids") or [None]
+        step = self.max_seats_per_notify
+        with connections[self.using].cursor() as cursor:
+            for i in range(0, len(seat_ids), step):
+                chunk = dict(event)
+                if "seat_ids" in event:
+                    chunk["seat_ids"] = seat_ids[i : i + step]
+                cursor.execute(
+                    "SELECT pg_notify(%s, %s)",
+                    [self.channel, json.dumps(chunk, separators=(",", ":"))],
+                )
+        return 0
+
+    def subscribe(self, showtime_id):
+        if self._is_postgres:
+            self._ensure_listener()
+        return super().subscribe(showtime_id)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name="seat-events-listener", daemon=True
+                )
+                self._listener.start()
+
+    def _deliver(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        InMemoryBroker.publish(self, event["showtime_id"], event)
+
+    def _resync_all(self):
+        """Mất kết nối LISTEN có thể làm lỡ sự kiện: báo mọi client tải lại"""
+        with self._lock:
+            showtime_ids = list(self._subscribers)
+        for showtime_id in showtime_ids:
+            InMemoryBroker.publish(self, showtime_id, {"type": "resync"})
+
+    def _listen(self):
+        wrapper = connections[self.using]
+        while True:
+            conn = None
+            try:
+                conn = wrapper.get_new_connection(wrapper.get_connection_params())
+                conn.autocommit = True
+                conn.cursor().execute(f'LISTEN "{self.channel}"')
+                while True:
+                    for payload in self._wait(conn):
+                        self._deliver(payload)
+            except Exception:
+                logger.exception("Mất kết nối LISTEN %s, kết nối lại", self.channel)
+                self._resync_all()
+                time.sleep(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _wait(self, conn):
+        """Payload các NOTIFY nhận được trong tối đa poll_timeout giây"""
+        if hasattr(conn, "poll"):
+            # psycopg2
+            if select.select([conn], [], [], self.poll_timeout)[0]:
+                conn.poll()
+            notifies = conn.notifies[:]
+            del conn.notifies[:]
+            return [notify.payload for notify in notifies]
+        # psycopg 3
+        return [
+            notify.payload for notify in conn.notifies(timeout=self.poll_timeout)
+        ]
+
+
+def encode(event):
+    """Message SSE: id là seat_version để client nối lại bằng seats/changes"""
+    lines = []
+    if event.get("seat_version") is not None:
+        lines.append(f"id: {event['seat_version']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(settings, "SEAT_EVENT_BROKER", DEFAULT_BROKER)
+                _broker = import_string(broker_path)()
+    return _broker
+
+
+def publish_seat_event(showtime_id, event_type, seat_ids, seat_version):
+    """Publish sự kiện ghế sau khi transaction hiện tại commit"""
+    event = {
+        "type": event_type,
+        "showtime_id": str(showtime_id),
+        "seat_ids": [str(seat_id) for seat_id in seat_ids],
+        "status": "booked" if event_type in BOOKED_EVENTS else "available",
+        "seat_version": seat_version,
+    }
+    transaction.on_commit(lambda: get_broker().publish(showtime_id, event))
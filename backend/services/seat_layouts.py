@@ -0,0 +1,222 @@
+"""Định nghĩa sơ đồ ghế dạng lưới và sinh ghế theo lô.
+
+Sơ đồ là JSON dạng {"rows": [{"label": "A", "seats": "SSSS..SSSS"}, ...]},
+mỗi ký tự là một ô trên lưới:
+
+    S  ghế thường      V  ghế VIP        A  ghế cho người khuyết tật
+    C  ghế đôi (mỗi dãy C liền nhau được ghép thành từng cặp từ trái sang)
+    .  _  hoặc dấu cách: lối đi / ô trống
+
+Số ghế là số thứ tự cột trên lưới (bắt đầu từ 1) nên ô trống làm số ghế
+nhảy cóc, và các ghế ở hai bên lối đi không được coi là liền nhau khi xếp
+chỗ. "label" có thể bỏ trống, hàng sẽ được đặt tên A, B, C, ... theo thứ tự.
+"""
+from dataclasses import dataclass
+from string import ascii_uppercase
+
+from django.db import transaction
+from api.models import Seat
+from services import inventory, seat_map
+
+SEAT_CODES = {
+    "S": Seat.STANDARD,
+    "V": Seat.VIP,
+    "C": Seat.COUPLE,
+    "A": Seat.ACCESSIBLE,
+}
+GAP_CODES = {".", "_", " "}
+
+MAX_ROWS = len(ascii_uppercase)
+MAX_COLUMNS = 60
+MAX_SEATS = 1200
+
+
+class LayoutError(Exception):
+    """Định nghĩa sơ đồ ghế không hợp lệ hoặc không áp dụng được"""
+
+
+@dataclass(frozen=True)
+class SeatSpec:
+    row_label: str
+    seat_number: int
+    seat_type: str
+    pair_group: int = None  # hai ghế đôi cùng hàng, cùng pair_group là một cặp
+
+    @property
+    def key(self):
+        return self.row_label, self.seat_number
+
+
+def from_counts(standard_row_count, vip_row_count, couple_row_count, seats_per_row):
+    """Sơ đồ tương đương cấu hình cũ (số hàng theo loại + số ghế mỗi hàng)"""
+    rows = (
+        ["S" * seats_per_row] * standard_row_count
+        + ["V" * seats_per_row] * vip_row_count
+        # Hàng ghế đôi lẻ ghế thì ghế cuối là ghế thường
+        + ["C" * (seats_per_row - seats_per_row % 2) + "S" * (seats_per_row % 2)]
+        * couple_row_count
+    )
+    return {"rows": [{"seats": seats} for seats in rows]}
+
+
+def parse(definition):
+    """Kiểm tra định nghĩa sơ đồ, trả về danh sách SeatSpec"""
+    if not isinstance(definition, dict) or not isinstance(
+        definition.get("rows"), list
+    ):
+        raise LayoutError('Sơ đồ ghế phải có dạng {"rows": [...]}')
+    rows = definition["rows"]
+    if not rows:
+        raise LayoutError("Sơ đồ ghế phải có ít nhất một hàng")
+    if len(rows) > MAX_ROWS:
+        raise LayoutError(f"Sơ đồ ghế tối đa {MAX_ROWS} hàng")
+
+    specs = []
+    labels = set()
+    for position, row in enumerate(rows):
+        if not isinstance(row, dict) or not isinstance(row.get("seats"), str):
+            raise LayoutError(f"Hàng thứ {position + 1} thiếu chuỗi 'seats'")
+        label = str(row.get("label") or ascii_uppercase[position]).strip().upper()
+        if not label or len(label) > 5:
+            raise LayoutError(f"Tên hàng '{label}' không hợp lệ (1-5 ký tự)")
+        if label in labels:
+            raise LayoutError(f"Trùng tên hàng {label}")
+        labels.add(label)
+
+        cells = row["seats"].upper()
+        if len(cells) > MAX_COLUMNS:
+            raise LayoutError(f"Hàng {label} vượt quá {MAX_COLUMNS} ô")
+
+        pair_group = 0
+        couple_run = []
+        for column, code in enumerate(cells + ".", start=1):
+            if code != "C" and couple_run:
+                if len(couple_run) % 2:
+                    raise LayoutError(
+                        f"Hàng {label}: ghế đôi phải đi theo cặp "
+                        f"(ghế {couple_run[0]}-{couple_run[-1]})"
+                    )
+                for i in range(0, len(couple_run), 2):
+                    pair_group += 1
+                    specs.extend(
+                        SeatSpec(label, number, Seat.COUPLE, pair_group)
+                        for number in couple_run[i : i + 2]
+                    )
+                couple_run = []
+
+            if column > len(cells) or code in GAP_CODES:
+                continue
+            if code not in SEAT_CODES:
+                raise LayoutError(f"Hàng {label}: ký hiệu ghế '{code}' không hợp lệ")
+            if code == "C":
+                couple_run.append(column)
+            else:
+                specs.append(SeatSpec(label, column, SEAT_CODES[code]))
+
+    if not specs:
+        raise LayoutError("Sơ đồ ghế không có ghế nào")
+    if len(specs) > MAX_SEATS:
+        raise LayoutError(f"Sơ đồ ghế tối đa {MAX_SEATS} ghế")
+    return sorted(specs, key=lambda spec: spec.key)
+
+
+def summarize(specs):
+    """Các trường tổng hợp của Auditorium (số hàng theo loại ghế chủ đạo,
+    số ô của hàng dài nhất) để hiển thị như cấu hình cũ"""
+    rows = {}
+    for spec in specs:
+        rows.setdefault(spec.row_label, []).append(spec)
+
+    counts = {Seat.STANDARD: 0, Seat.VIP: 0, Seat.COUPLE: 0}
+    for row in rows.values():
+        types = [spec.seat_type for spec in row]
+        dominant = max(counts, key=types.count)
+        counts[dominant] += 1
+    return {
+        "standard_row_count": counts[Seat.STANDARD],
+        "vip_row_count": counts[Seat.VIP],
+        "couple_row_count": counts[Seat.COUPLE],
+        "seats_per_row": max(row[-1].seat_number for row in rows.values()),
+    }
+
+
+def definition_for(auditorium):
+    """Sơ đồ đã lưu của phòng, hoặc sơ đồ suy ra từ cấu hình số hàng"""
+    if auditorium.layout:
+        return auditorium.layout
+    return from_counts(
+        auditorium.standard_row_count,
+        auditorium.vip_row_count,
+        auditorium.couple_row_count,
+        auditorium.seats_per_row,
+    )
+
+
+def apply_layout(auditorium, specs):
+    """Đồng bộ ghế của phòng với sơ đồ mới bằng một lần so sánh.
+
+    Ghế giữ nguyên vị trí được giữ nguyên id (vé, mã QR vẫn trỏ đúng ghế),
+    ghế đổi loại được bulk_update, ghế mới được bulk_create và ghế không còn
+    trong sơ đồ bị xóa. Raise LayoutError nếu ghế cần xóa đã có vé.
+    Trả về số ghế created / updated / deleted / unchanged.
+    """
+    wanted = {spec.key: spec for spec in specs}
+
+    with transaction.atomic():
+        existing = {
+            (seat.row_label, seat.seat_number): seat
+            for seat in Seat.objects.select_for_update().filter(auditorium=auditorium)
+        }
+
+        removed = [seat for key, seat in existing.items() if key not in wanted]
+        if removed:
+            sold = (
+                Seat.objects.filter(id__in=[seat.id for seat in removed])
+                .filter(tickets__isnull=False)
+                .distinct()
+                .order_by("row_label", "seat_number")
+                .values_list("row_label", "seat_number")
+            )
+            if sold:
+                labels = ", ".join(f"{row}{number}" for row, number in sold[:20])
+                raise LayoutError(f"Không thể xóa ghế đã có vé: {labels}")
+
+        changed = []
+        for key, seat in existing.items():
+            spec = wanted.get(key)
+            if spec is None:
+                continue
+            if (seat.seat_type, seat.pair_group) != (spec.seat_type, spec.pair_group):
+                seat.seat_type, seat.pair_group = spec.seat_type, spec.pair_group
+                changed.append(seat)
+
+        created = [
+            Seat(
+                auditorium=auditorium,
+                row_label=spec.row_label,
+                seat_number=spec.seat_number,
+                seat_type=spec.seat_type,
+                pair_group=spec.pair_group,
+            )
+            for key, spec in wanted.items()
+            if key not in existing
+        ]
+
+        if removed:
+            Seat.objects.filter(id__in=[seat.id for seat in removed]).delete()
+        if changed:
+            Seat.objects.bulk_update(changed, ["seat_type", "pair_group"])
+        if created:
+            Seat.objects.bulk_create(created)
+
+        if removed or changed or created:
+            # Sơ đồ ghế đã thay đổi -> làm mới cache và tổng số ghế
+            seat_map.invalidate_layout(auditorium)
+            inventory.refresh_auditorium_totals(auditorium)
+
+    return {
+        "created": len(created),
+        "updated": len(changed),
+        "deleted": len(removed),
+        "unchanged": len(existing) - len(removed) - len(changed),
+    }
@@ -0,0 +1,369 @@
+"""Engine trạng thái ghế dạng bitmap.
+
+Mỗi phòng chiếu có một SeatLayout cố định: ghế được đánh số thứ tự 0..n-1
+theo (row_label, seat_number). Trạng thái ghế của một suất chiếu là một
+bitmap (số nguyên Python, bit i = ghế thứ i đã bị chiếm), nên các phép kiểm
+tra ghế trống chỉ là phép AND/OR trên bitmap.
+
+SeatLayout được cache trong process theo Auditorium.layout_version; khi sơ
+đồ ghế thay đổi chỉ cần tăng version (invalidate_layout) là mọi process sẽ
+tự nạp lại ở lần đọc tiếp theo.
+"""
+import hashlib
+
+from django.db.models import F
+from api.models import Auditorium, Seat, Ticket
+
+# auditorium_id -> SeatLayout mới nhất đã nạp
+_layout_cache = {}
+
+
+class SeatLayout:
+    """Sơ đồ ghế của một phòng chiếu, thứ tự ghế không đổi"""
+
+    __slots__ = (
+        "auditorium_id",
+        "version",
+        "seat_ids",
+        "index",
+        "rows",
+        "seats",
+        "payloads",
+        "type_masks",
+        "type_counts",
+        "full_mask",
+        "partners",
+        "_columns",
+    )
+
+    def __init__(self, auditorium_id, seats, version=None, pair_groups=None):
+        """seats: danh sách (id, row_label, seat_number, seat_type) đã sắp xếp;
+        pair_groups: Seat.pair_group của từng ghế (cùng thứ tự, có thể None)"""
+        self.auditorium_id = auditorium_id
+        self.version = version
+        self.seats = tuple(
+            (str(seat_id), row_label, seat_number, seat_type)
+            for seat_id, row_label, seat_number, seat_type in seats
+        )
+        self.seat_ids = tuple(seat[0] for seat in self.seats)
+        # Phần thông tin tĩnh của từng ghế trong sơ đồ, chỉ cần copy khi trả về
+        self.payloads = tuple(
+            {
+                "id": seat_id,
+                "row_label": row_label,
+                "seat_number": seat_number,
+                "seat_type": seat_type,
+                "price_multiplier": Seat.PRICE_MULTIPLIER.get(seat_type, 1.0),
+            }
+            for seat_id, row_label, seat_number, seat_type in self.seats
+        )
+        self.index = {seat_id: i for i, seat_id in enumerate(self.seat_ids)}
+        self.full_mask = (1 << len(self.seats)) - 1
+
+        # Hàng ghế -> danh sách index theo thứ tự
+        rows = {}
+        type_masks = {}
+        for i, (_, row_label, _, seat_type) in enumerate(self.seats):
+            rows.setdefault(row_label, []).append(i)
+            type_masks[seat_type] = type_masks.get(seat_type, 0) | (1 << i)
+        self.rows = {row_label: tuple(indexes) for row_label, indexes in rows.items()}
+        self.type_masks = type_masks
+        self.type_counts = {
+            seat_type: mask.bit_count() for seat_type, mask in type_masks.items()
+        }
+
+        # Ghế đôi đi theo cặp: theo pair_group của sơ đồ, ghế cũ chưa có
+        # pair_group thì ghép 1-2, 3-4, ...
+        partners = [None] * len(self.seats)
+        pair_groups = pair_groups or [None] * len(self.seats)
+        positions = {
+            (row_label, seat_number): i
+            for i, (_, row_label, seat_number, _) in enumerate(self.seats)
+        }
+        groups = {}
+        for i, (_, row_label, seat_number, seat_type) in enumerate(self.seats):
+            if seat_type != Seat.COUPLE:
+                continue
+            if pair_groups[i] is not None:
+                groups.setdefault((row_label, pair_groups[i]), []).append(i)
+                continue
+            partner_number = seat_number + 1 if seat_number % 2 else seat_number - 1
+            partner = positions.get((row_label, partner_number))
+            if partner is not None and self.seats[partner][3] == Seat.COUPLE:
+                partners[i] = partner
+        for pair in groups.values():
+            if len(pair) == 2:
+                partners[pair[0]], partners[pair[1]] = pair[1], pair[0]
+        self.partners = tuple(partners)
+        self._columns = None
+
+    @classmethod
+    def load(cls, auditorium_id, version=None):
+        rows = list(
+            Seat.objects.filter(auditorium_id=auditorium_id)
+            .order_by("row_label", "seat_number")
+            .values_list("id", "row_label", "seat_number", "seat_type", "pair_group")
+        )
+        return cls(
+            auditorium_id,
+            [row[:4] for row in rows],
+            version,
+            pair_groups=[row[4] for row in rows],
+        )
+
+    def __len__(self):
+        return len(self.seats)
+
+    def mask_for(self, seat_ids):
+        """Đổi danh sách seat id -> (bitmap, các id không thuộc phòng)"""
+        mask = 0
+        unknown = []
+        for seat_id in seat_ids:
+            i = self.index.get(str(seat_id))
+            if i is None:
+                unknown.append(seat_id)
+            else:
+                mask |= 1 << i
+        return mask, unknown
+
+    def indexes(self, mask):
+        """Các index có bit bật trong bitmap, theo thứ tự tăng dần"""
+        result = []
+        while mask:
+            low_bit = mask & -mask
+            result.append(low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return result
+
+    def ids_for(self, mask):
+        return [self.seat_ids[i] for i in self.indexes(mask)]
+
+    def label(self, i):
+        _, row_label, seat_number, _ = self.seats[i]
+        return f"{row_label}{seat_number}"
+
+    def is_contiguous(self, indexes):
+        """Các ghế cùng hàng, số ghế liên tiếp nhau"""
+        first, last = self.seats[indexes[0]], self.seats[indexes[-1]]
+        return first[1] == last[1] and last[2] - first[2] == len(indexes) - 1
+
+    def splits_pair(self, mask):
+        """Mask chỉ lấy một ghế của một cặp ghế đôi"""
+        for i in self.indexes(mask):
+            partner = self.partners[i]
+            if partner is not None and not mask >> partner & 1:
+                return True
+        return False
+
+    def columns(self):
+        """Sơ đồ ghế dạng cột: các mảng cùng thứ tự index ghế (partners là
+        index ghế cùng cặp ghế đôi), gọn hơn một object cho mỗi ghế"""
+        if self._columns is None:
+            self._columns = {
+                "ids": list(self.seat_ids),
+                "row_labels": [seat[1] for seat in self.seats],
+                "seat_numbers": [seat[2] for seat in self.seats],
+                "seat_types": [seat[3] for seat in self.seats],
+                "partners": list(self.partners),
+                "price_multipliers": dict(Seat.PRICE_MULTIPLIER),
+            }
+        return self._columns
+
+    def seat_summary(self):
+        """Số ghế theo từng loại"""
+        return {
+            Seat.STANDARD: self.type_counts.get(Seat.STANDARD, 0),
+            Seat.VIP: self.type_counts.get(Seat.VIP, 0),
+            Seat.COUPLE: self.type_counts.get(Seat.COUPLE, 0),
+            Seat.ACCESSIBLE: self.type_counts.get(Seat.ACCESSIBLE, 0),
+        }
+
+
+class SeatOccupancy:
+    """Bitmap ghế đã bị chiếm của một suất chiếu"""
+
+    __slots__ = ("layout", "occupied")
+
+    def __init__(self, layout, occupied=0):
+        self.layout = layout
+        self.occupied = occupied & layout.full_mask
+
+    @classmethod
+    def load(cls, showtime, layout):
+        booked_seat_ids = (
+            Ticket.objects.filter(showtime=showtime)
+            .active()
+            .values_list("seat_id", flat=True)
+        )
+        occupied, _ = layout.mask_for(booked_seat_ids)
+        return cls(layout, occupied)
+
+    @property
+    def available(self):
+        return self.layout.full_mask & ~self.occupied
+
+    @property
+    def booked_count(self):
+        return self.occupied.bit_count()
+
+    @property
+    def available_count(self):
+        return len(self.layout) - self.booked_count
+
+    def is_booked(self, i):
+        return bool(self.occupied >> i & 1)
+
+    def conflicts(self, mask):
+        """Các ghế trong mask đã bị chiếm"""
+        return mask & self.occupied
+
+    def to_bytes(self):
+        """Bitmap dạng bytes (little-endian, 1 bit/ghế)"""
+        return self.occupied.to_bytes((len(self.layout) + 7) // 8, "little")
+
+    @classmethod
+    def from_bytes(cls, layout, data):
+        return cls(layout, int.from_bytes(data, "little"))
+
+
+def get_layout(auditorium):
+    """Sơ đồ ghế của phòng chiếu (lấy từ cache nếu đúng version)"""
+    layout = _layout_cache.get(auditorium.id)
+    if layout is None or layout.version != auditorium.layout_version:
+        layout = SeatLayout.load(auditorium.id, auditorium.layout_version)
+        _layout_cache[auditorium.id] = layout
+    return layout
+
+
+def invalidate_layout(auditorium):
+    """Đánh dấu sơ đồ ghế đã thay đổi (gọi sau khi tạo/sửa ghế)"""
+    Auditorium.objects.filter(pk=auditorium.pk).update(
+        layout_version=F("layout_version") + 1
+    )
+    auditorium.refresh_from_db(fields=["layout_version"])
+    _layout_cache.pop(auditorium.id, None)
+
+
+def get_occupancy(showtime):
+    """Sơ đồ ghế + trạng thái chiếm chỗ hiện tại của suất chiếu"""
+    layout = get_layout(showtime.auditorium)
+    return SeatOccupancy.load(showtime, layout)
+
+
+def find_best_block(occupancy, party_size, seat_type=None):
+    """Khối party_size ghế trống liền nhau tốt nhất: ưu tiên hàng gần giữa
+    phòng, sau đó gần giữa hàng. Trả về danh sách index ghế hoặc None."""
+    layout = occupancy.layout
+    available = occupancy.available
+    if seat_type is not None:
+        available &= layout.type_masks.get(seat_type, 0)
+
+    row_labels = sorted(layout.rows)
+    centre_row = (len(row_labels) - 1) / 2
+    block_mask = (1 << party_size) - 1
+    best_score = best_block = None
+
+    for row_position, row_label in enumerate(row_labels):
+        row = layout.rows[row_label]
+        if len(row) < party_size:
+            continue
+        row_distance = abs(row_position - centre_row)
+        if best_score is not None and row_distance > best_score[0]:
+            continue
+        centre_offset = (len(row) - party_size) / 2
+
+        for offset in range(len(row) - party_size + 1):
+            # Index ghế trong một hàng liên tiếp nhau nên khối là một dải bit
+            mask = block_mask << row[offset]
+            if available & mask != mask:
+                continue
+            block = row[offset : offset + party_size]
+            if not layout.is_contiguous(block) or layout.splits_pair(mask):
+                continue
+            # Không ghép các loại ghế khác nhau vào một khối
+            if not any(
+                type_mask & mask == mask for type_mask in layout.type_masks.values()
+            ):
+                continue
+
+            score = (row_distance, abs(offset - centre_offset))
+            if best_score is None or score < best_score:
+                best_score, best_block = score, list(block)
+
+    return best_block
+
+
+def seat_map_etag(showtime, seat_version, can_book, expired_holds=0):
+    """ETag của sơ đồ ghế suất chiếu: đổi khi ghế, sơ đồ phòng hoặc suất chiếu đổi.
+
+    expired_holds: số vé giữ chỗ đã hết hạn nhưng chưa được sweeper hủy.
+    """
+    fingerprint = "|".join(
+        str(part)
+        for part in (
+            showtime.id,
+            seat_version,
+            showtime.auditorium.layout_version,
+            showtime.base_price,
+            showtime.status,
+            showtime.start_time.isoformat(),
+            showtime.end_time.isoformat(),
+            showtime.movie_id,
+            can_book,
+            expired_holds,
+        )
+    )
+    return '"%s"' % hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def seat_prices(base_price):
+    """Giá vé theo từng loại ghế"""
+    base_price = float(base_price)
+    return {
+        seat_type: base_price * multiplier
+        for seat_type, multiplier in Seat.PRICE_MULTIPLIER.items()
+    }
+
+
+def build_seat_map(occupancy, base_price):
+    """Dữ liệu seats_by_row cho sơ đồ ghế của suất chiếu"""
+    prices = seat_prices(base_price)
+    default_price = float(base_price)
+    occupied = occupancy.occupied
+    seats_by_row = {}
+
+    for i, payload in enumerate(occupancy.layout.payloads):
+        is_booked = occupied >> i & 1
+        seat_data = payload.copy()
+        seat_data["is_available"] = not is_booked
+        seat_data["status"] = "booked" if is_booked else "available"
+        seat_data["ticket_price"] = prices.get(payload["seat_type"], default_price)
+
+        row = seats_by_row.get(payload["row_label"])
+        if row is None:
+            row = seats_by_row[payload["row_label"]] = []
+        row.append(seat_data)
+
+    return seats_by_row
+
+
+def build_layout_map(layout):
+    """Dữ liệu seats_by_row của phòng chiếu (không kèm trạng thái đặt chỗ)"""
+    seats_by_row = {}
+    for payload in layout.payloads:
+        row = seats_by_row.get(payload["row_label"])
+        if row is None:
+            row = seats_by_row[payload["row_label"]] = []
+        row.append(
+            {
+                "id": payload["id"],
+                "row_label": payload["row_label"],
+                "seat_number": payload["seat_number"],
+                "seat_type": payload["seat_type"],
+                "price_info": {
+                    "seat_type": payload["seat_type"],
+                    "multiplier": payload["price_multiplier"],
+                },
+            }
+        )
+    return seats_by_row
@@ -0,0 +1,155 @@
+"""Mã QR vé ký bằng HMAC, kiểm tra tại cổng không cần đọc DB.
+
+Mã gồm (phiên bản, ticket id, showtime id, seat id, khung giờ được check-in,
+nhãn ghế) + 16 byte đầu của HMAC-SHA256, mã hóa base64url. Khung giờ
+check-in là từ CHECK_IN_OPENS_BEFORE trước giờ chiếu đến giờ kết thúc.
+Sau khi kiểm tra chữ ký, vé được check-in bằng một câu UPDATE có điều kiện
+status = paid nên quét hai lần cùng một vé chỉ thành công một lần.
+"""
+import base64
+import hmac
+import struct
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from api.models import Ticket
+from services import inventory, seat_events
+
+VERSION = 1
+CHECK_IN_OPENS_BEFORE = timedelta(minutes=30)
+KEY_SALT = "api.ticket_codes"
+SIGNATURE_SIZE = 16
+# version, ticket, showtime, seat, valid_from, valid_until
+_HEADER = struct.Struct(">B16s16s16sII")
+
+
+class InvalidTicketCode(Exception):
+    """Mã vé sai định dạng, sai chữ ký hoặc ngoài khung giờ check-in"""
+
+
+@dataclass(frozen=True)
+class TicketCode:
+    ticket_id: uuid.UUID
+    showtime_id: uuid.UUID
+    seat_id: uuid.UUID
+    valid_from: datetime
+    valid_until: datetime
+    seat_label: str
+
+
+def _sign(payload):
+    secret = getattr(settings, "TICKET_QR_SECRET", None) or settings.SECRET_KEY
+    return salted_hmac(KEY_SALT, payload, secret=secret, algorithm="sha256").digest()[
+        :SIGNATURE_SIZE
+    ]
+
+
+def encode(ticket_id, showtime_id, seat_id, valid_from, valid_until, seat_label):
+    payload = _HEADER.pack(
+        VERSION,
+        uuid.UUID(str(ticket_id)).bytes,
+        uuid.UUID(str(showtime_id)).bytes,
+        uuid.UUID(str(seat_id)).bytes,
+        int(valid_from.timestamp()),
+        int(valid_until.timestamp()),
+    ) + seat_label.encode()
+    return base64.urlsafe_b64encode(payload + _sign(payload)).rstrip(b"=").decode()
+
+
+def decode(code):
+    """Kiểm tra chữ ký và giải mã; raise InvalidTicketCode nếu không hợp lệ"""
+    try:
+        raw = base64.urlsafe_b64decode(code + "=" * (-len(code) % 4))
+    except (TypeError, ValueError):
+        raise InvalidTicketCode("Mã vé không đúng định dạng")
+    if len(raw) < _HEADER.size + SIGNATURE_SIZE:
+        raise InvalidTicketCode("Mã vé không đúng định dạng")
+
+    payload, signature = raw[:-SIGNATURE_SIZE], raw[-SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidTicketCode("Mã vé không hợp lệ")
+
+    version, ticket, showtime, seat, valid_from, valid_until = _HEADER.unpack(
+        payload[: _HEADER.size]
+    )
+    if version != VERSION:
+        raise InvalidTicketCode("Mã vé không đúng định dạng")
+    return TicketCode(
+        ticket_id=uuid.UUID(bytes=ticket),
+        showtime_id=uuid.UUID(bytes=showtime),
+        seat_id=uuid.UUID(bytes=seat),
+        valid_from=datetime.fromtimestamp(valid_from, dt_timezone.utc),
+        valid_until=datetime.fromtimestamp(valid_until, dt_timezone.utc),
+        seat_label=payload[_HEADER.size :].decode(),
+    )
+
+
+def verify(code, now=None):
+    """Giải mã và kiểm tra khung giờ check-in (không đọc DB)"""
+    ticket_code = decode(code)
+    now = now or timezone.now()
+    if now < ticket_code.valid_from:
+        local_time = timezone.localtime(ticket_code.valid_from)
+        raise InvalidTicketCode(f"Chỉ có thể check-in từ {local_time:%H:%M}")
+    if now > ticket_code.valid_until:
+        raise InvalidTicketCode("Suất chiếu đã kết thúc")
+    return ticket_code
+
+
+def assign_codes(tickets):
+    """Tạo mã QR cho các ticket (gọi khi vé được thanh toán)"""
+    tickets = list(tickets.select_related("seat", "showtime"))
+    for ticket in tickets:
+        ticket.qr_code = encode(
+            ticket.id,
+            ticket.showtime_id,
+            ticket.seat_id,
+            ticket.showtime.start_time - CHECK_IN_OPENS_BEFORE,
+            ticket.showtime.end_time,
+            f"{ticket.seat.row_label}{ticket.seat.seat_number}",
+        )
+    Ticket.objects.bulk_update(tickets, ["qr_code"])
+    return tickets
+
+
+def check_in(ticket_code):
+    """Check-in vé đã xác thực chữ ký; trả về (thành công, trạng thái vé hiện tại)"""
+    with transaction.atomic():
+        # UPDATE có điều kiện trước: lượt quét trùng / vé đã hủy không đụng
+        # tới dòng ShowtimeInventory (khóa chung của cả suất chiếu)
+        updated = Ticket.objects.filter(
+            id=ticket_code.ticket_id,
+            showtime_id=ticket_code.showtime_id,
+            status=Ticket.PAID,
+        ).update(status=Ticket.CHECKED_IN)
+
+        if updated:
+            seat_version = inventory.apply_deltas(
+                ticket_code.showtime_id,
+                {Ticket.PAID: -1, Ticket.CHECKED_IN: 1},
+                tickets_written=True,
+            )
+            Ticket.objects.filter(id=ticket_code.ticket_id).update(
+                seat_version=seat_version
+            )
+            seat_events.publish_seat_event(
+                ticket_code.showtime_id,
+                seat_events.EVENT_TYPES[Ticket.CHECKED_IN],
+                [ticket_code.seat_id],
+                seat_version,
+            )
+            return True, Ticket.CHECKED_IN
+
+    # Trạng thái hiện tại để cổng soát vé báo đúng lỗi (đã check-in, chưa
+    # thanh toán, không tồn tại); đọc ngoài transaction, không khóa
+    current_status = (
+        Ticket.objects.filter(id=ticket_code.ticket_id)
+        .values_list("status", flat=True)
+        .first()
+    )
+    return False, current_status
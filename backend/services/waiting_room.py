@@ -0,0 +1,210 @@
+"""Phòng chờ cho suất chiếu đông khách (Showtime.queue_enabled).
+
+Mỗi người vào hàng nhận một token đã ký chứa số thứ tự. Hàng được mở dần
+với tốc độ Showtime.queue_admit_rate người/phút: vị trí p được vào đặt vé
+khi p <= admitted. admitted được tính lười mỗi lần đọc trạng thái nên không
+cần job nền, và không vượt quá số người đã vào hàng (không dồn lượt khi hàng
+trống). Chỉ token đã được vào mới tạo được booking.
+
+Trạng thái hàng (issued, admitted) nằm trong store cấu hình qua setting
+WAITING_ROOM_STORE: InMemoryQueueStore (một process) hoặc DatabaseQueueStore
+(dùng chung giữa các process qua bảng ShowtimeQueue).
+"""
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from api.models import ShowtimeQueue
+
+DEFAULT_STORE = "services.waiting_room.DatabaseQueueStore"
+DEFAULT_TOKEN_MAX_AGE = 3600
+TOKEN_SALT = "api.waiting_room"
+
+
+class QueueTokenInvalid(Exception):
+    """Token hàng chờ sai chữ ký, hết hạn hoặc không thuộc suất chiếu/user"""
+
+
+@dataclass
+class QueueState:
+    issued: int  # số token đã phát
+    admitted: int  # các vị trí <= admitted đã được vào
+
+
+def advance(issued, admitted, updated_at, rate, now):
+    """Mở thêm lượt theo thời gian trôi qua kể từ lần cập nhật trước.
+
+    Trả về (admitted mới, mốc thời gian mới); phần lẻ chưa đủ một lượt được
+    giữ lại bằng cách chỉ dời mốc thời gian theo số lượt đã mở.
+    """
+    if rate <= 0 or admitted >= issued:
+        # rate = 0: tạm dừng mở lượt
+        return admitted, updated_at
+    seconds_per_admission = 60 / rate
+    opened = int((now - updated_at).total_seconds() / seconds_per_admission)
+    if not opened:
+        return admitted, updated_at
+    if admitted + opened >= issued:
+        return issued, now
+    return (
+        admitted + opened,
+        updated_at + timedelta(seconds=opened * seconds_per_admission),
+    )
+
+
+def new_queue_time(now):
+    """Mốc thời gian của hàng mới tạo: người đầu tiên được vào ngay"""
+    return now - timedelta(minutes=1)
+
+
+class QueueStore:
+    """Giao diện store trạng thái hàng chờ"""
+
+    def join(self, showtime, now):
+        """Cấp vị trí tiếp theo, trả về (vị trí, QueueState)"""
+        raise NotImplementedError
+
+    def state(self, showtime, now):
+        """Trạng thái hiện tại (đã mở thêm lượt theo thời gian)"""
+        raise NotImplementedError
+
+
+class InMemoryQueueStore(QueueStore):
+    """Store trong process, chỉ dùng khi chạy một process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = {}  # showtime_id -> [issued, admitted, updated_at]
+
+    def _advance(self, showtime, now):
+        queue = self._queues.setdefault(showtime.id, [0, 0, new_queue_time(now)])
+        queue[1], queue[2] = advance(
+            queue[0], queue[1], queue[2], showtime.queue_admit_rate, now
+        )
+        return queue
+
+    def join(self, showtime, now):
+        with self._lock:
+            queue = self._queues.setdefault(showtime.id, [0, 0, new_queue_time(now)])
+            queue[0] += 1
+            self._advance(showtime, now)
+            return queue[0], QueueState(queue[0], queue[1])
+
+    def state(self, showtime, now):
+        with self._lock:
+            queue = self._advance(showtime, now)
+            return QueueState(queue[0], queue[1])
+
+
+class DatabaseQueueStore(QueueStore):
+    """Store dùng bảng ShowtimeQueue, khóa dòng khi cập nhật"""
+
+    def _locked(self, showtime, now, joining=False):
+        ShowtimeQueue.objects.get_or_create(
+            showtime_id=showtime.id, defaults={"updated_at": new_queue_time(now)}
+        )
+        queue = ShowtimeQueue.objects.select_for_update().get(showtime_id=showtime.id)
+        if joining:
+            queue.issued_count += 1
+        admitted, updated_at = advance(
+            queue.issued_count,
+            queue.admitted_count,
+            queue.updated_at,
+            showtime.queue_admit_rate,
+            now,
+        )
+        changed = (admitted, updated_at) != (queue.admitted_count, queue.updated_at)
+        queue.admitted_count, queue.updated_at = admitted, updated_at
+        return queue, changed
+
+    def join(self, showtime, now):
+        with transaction.atomic():
+            queue, _ = self._locked(showtime, now, joining=True)
+            queue.save()
+            return queue.issued_count, QueueState(
+                queue.issued_count, queue.admitted_count
+            )
+
+    def state(self, showtime, now):
+        queue = ShowtimeQueue.objects.filter(showtime_id=showtime.id).first()
+        if queue is None:
+            return QueueState(0, 0)
+        if queue.admitted_count >= queue.issued_count:
+            return QueueState(queue.issued_count, queue.admitted_count)
+
+        with transaction.atomic():
+            queue, changed = self._locked(showtime, now)
+            if changed:
+                queue.save(update_fields=["admitted_count", "updated_at"])
+            return QueueState(queue.issued_count, queue.admitted_count)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_path = getattr(settings, "WAITING_ROOM_STORE", DEFAULT_STORE)
+                _store = import_string(store_path)()
+    return _store
+
+
+def issue_token(showtime, user, position):
+    return signing.dumps(
+        {"s": str(showtime.id), "u": str(user.pk), "p": position}, salt=TOKEN_SALT
+    )
+
+
+def read_token(showtime, user, token):
+    """Vị trí trong hàng của token; raise QueueTokenInvalid nếu không hợp lệ"""
+    max_age = getattr(settings, "WAITING_ROOM_TOKEN_MAX_AGE", DEFAULT_TOKEN_MAX_AGE)
+    try:
+        data = signing.loads(token or "", salt=TOKEN_SALT, max_age=max_age)
+    except signing.BadSignature:
+        raise QueueTokenInvalid("Token hàng chờ không hợp lệ hoặc đã hết hạn")
+    if data.get("s") != str(showtime.id) or data.get("u") != str(user.pk):
+        raise QueueTokenInvalid("Token hàng chờ không thuộc suất chiếu này")
+    return data["p"]
+
+
+def describe(showtime, position, state):
+    """Thông tin trả cho client đang chờ"""
+    remaining = max(0, position - state.admitted)
+    rate = showtime.queue_admit_rate
+    return {
+        "position": position,
+        "admitted": not remaining,
+        "ahead": max(0, remaining - 1),
+        "estimated_wait_seconds": round(remaining * 60 / rate) if rate else None,
+    }
+
+
+def join(showtime, user):
+    position, state = get_store().join(showtime, timezone.now())
+    return {
+        "token": issue_token(showtime, user, position),
+        **describe(showtime, position, state),
+    }
+
+
+def status(showtime, user, token):
+    position = read_token(showtime, user, token)
+    state = get_store().state(showtime, timezone.now())
+    return describe(showtime, position, state)
+
+
+def is_admitted(showtime, user, token):
+    """Token đã tới lượt vào đặt vé chưa (False nếu token không hợp lệ)"""
+    try:
+        return status(showtime, user, token)["admitted"]
+    except QueueTokenInvalid:
+        return False
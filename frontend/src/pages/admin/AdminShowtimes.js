@@ -40,14 +40,12 @@ const AdminShowtimes = () => {
         auditoriumsAPI.getAll(),
       ]);
 
-      // ✅ THÊM: Gọi endpoint admin_all để lấy dữ liệu phân nhóm
-      let grouped = null;
+      // Dashboard phân nhóm theo trạng thái, mỗi nhóm có link trang sau
       try {
-        const groupedRes = await showtimesAPI.adminAll();
-        grouped = groupedRes.data;
-        setGroupedShowtimes(grouped);
+        const dashboardRes = await showtimesAPI.dashboard();
+        setGroupedShowtimes(dashboardRes.data);
       } catch (err) {
-        console.log('Admin all endpoint not available, using regular list');
+        console.log('Dashboard endpoint not available, using regular list');
       }
 
       // Đảm bảo tất cả đều là array
@@ -62,6 +60,24 @@ const AdminShowtimes = () => {
     }
   };
 
+  // Tải trang tiếp theo của một nhóm (theo link next của backend)
+  const loadMore = async (group) => {
+    const next = groupedShowtimes?.[group]?.next;
+    if (!next) return;
+    try {
+      const res = await showtimesAPI.nextPage(next);
+      setGroupedShowtimes(prev => ({
+        ...prev,
+        [group]: {
+          next: res.data.next,
+          results: [...prev[group].results, ...res.data.results],
+        },
+      }));
+    } catch (err) {
+      alert('Không thể tải thêm: ' + (err.response?.data?.error || err.message));
+    }
+  };
+
   const handleChange = (e) => {
     const { name, value } = e.target;
     setFormData({
@@ -356,26 +372,29 @@ const AdminShowtimes = () => {
       {groupedShowtimes && viewMode === 'grouped' ? (
         <div className="grouped-showtimes">
           {/* Đang chiếu */}
-          {groupedShowtimes.showing.length > 0 && (
+          {groupedShowtimes.showing.results.length > 0 && (
             <div className="showtime-group">
-              <h3 className="group-title showing">Đang chiếu ({groupedShowtimes.showing.length})</h3>
-              {renderShowtimeTable(groupedShowtimes.showing)}
+              <h3 className="group-title showing">Đang chiếu ({groupedShowtimes.summary.showing})</h3>
+              {renderShowtimeTable(groupedShowtimes.showing.results)}
+              {renderLoadMore('showing')}
             </div>
           )}
 
           {/* Sắp chiếu */}
-          {groupedShowtimes.upcoming.length > 0 && (
+          {groupedShowtimes.upcoming.results.length > 0 && (
             <div className="showtime-group">
-              <h3 className="group-title upcoming">Sắp chiếu ({groupedShowtimes.upcoming.length})</h3>
-              {renderShowtimeTable(groupedShowtimes.upcoming)}
+              <h3 className="group-title upcoming">Sắp chiếu ({groupedShowtimes.summary.upcoming})</h3>
+              {renderShowtimeTable(groupedShowtimes.upcoming.results)}
+              {renderLoadMore('upcoming')}
             </div>
           )}
 
           {/* Đã kết thúc */}
-          {groupedShowtimes.finished.length > 0 && (
+          {groupedShowtimes.finished.results.length > 0 && (
             <div className="showtime-group">
-              <h3 className="group-title finished">Đã kết thúc ({groupedShowtimes.finished.length})</h3>
-              {renderShowtimeTable(groupedShowtimes.finished)}
+              <h3 className="group-title finished">Đã kết thúc ({groupedShowtimes.summary.finished})</h3>
+              {renderShowtimeTable(groupedShowtimes.finished.results)}
+              {renderLoadMore('finished')}
             </div>
           )}
         </div>
@@ -385,6 +404,16 @@ const AdminShowtimes = () => {
     </div>
   );
 
+  function renderLoadMore(group) {
+    const { next, results } = groupedShowtimes[group];
+    if (!next) return null;
+    return (
+      <button className="btn-secondary" onClick={() => loadMore(group)}>
+        Xem thêm ({groupedShowtimes.summary[group] - results.length})
+      </button>
+    );
+  }
+
   // ✅ THÊM: Helper function để render table
   function renderShowtimeTable(data) {
     return (
@@ -18,6 +18,45 @@ const BookingPage = () => {
     fetchSeats();
   }, [showtimeId]);
 
+  // Nhận sự kiện giữ chỗ/nhả ghế realtime thay vì tải lại cả sơ đồ ghế
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+
+    const source = showtimesAPI.seatEvents(showtimeId);
+
+    const applySeatEvent = (message) => {
+      const event = JSON.parse(message.data);
+      const changedIds = new Set(event.seat_ids);
+      const isAvailable = event.status === 'available';
+
+      setSeatsByRow((current) => {
+        const updated = {};
+        Object.keys(current).forEach((row) => {
+          updated[row] = current[row].map((seat) =>
+            changedIds.has(String(seat.id))
+              ? { ...seat, is_available: isAvailable, status: event.status }
+              : seat
+          );
+        });
+        return updated;
+      });
+
+      // Bỏ chọn các ghế vừa bị người khác giữ
+      if (!isAvailable) {
+        setSelectedSeats((current) =>
+          current.filter((seat) => !changedIds.has(String(seat.id)))
+        );
+      }
+    };
+
+    ['hold', 'purchase', 'check_in', 'release', 'expiry'].forEach((type) =>
+      source.addEventListener(type, applySeatEvent)
+    );
+    source.addEventListener('resync', () => fetchSeats());
+
+    return () => source.close();
+  }, [showtimeId]);
+
   const fetchSeats = async () => {
     try {
       setLoading(true);
@@ -133,6 +172,7 @@ const handleBooking = async () => {
                      err.response?.data?.showtime?.[0] ||
                      err.response?.data?.non_field_errors?.[0] ||
                      err.response?.data?.detail ||
+                     err.response?.data?.error ||
                      'Đặt vé thất bại';
     setError(errorMsg);
     fetchSeats();
@@ -186,18 +226,25 @@ const handleBooking = async () => {
                 <div key={row} className="seat-row">
                   <div className="row-label">{row}</div>
                   <div className="row-seats">
-                    {seatsByRow[row].map((seat) => (
-                      <button
-                        key={seat.id}
-                        className={getSeatClassName(seat)}
-                        onClick={() => handleSeatClick(seat)}
-                        disabled={!seat.is_available}
-                        title={`${seat.row_label}${seat.seat_number} - ${
-                          seat.ticket_price.toLocaleString('vi-VN')
-                        }đ`}
-                      >
-                        {seat.seat_number}
-                      </button>
+                    {seatsByRow[row].map((seat, index) => (
+                      <React.Fragment key={seat.id}>
+                        {/* Số ghế nhảy cóc = lối đi / ô trống trong sơ đồ */}
+                        {index > 0 &&
+                          Array.from(
+                            { length: seat.seat_number - seatsByRow[row][index - 1].seat_number - 1 },
+                            (_, gap) => <div key={`gap-${gap}`} className="seat-gap" />
+                          )}
+                        <button
+                          className={getSeatClassName(seat)}
+                          onClick={() => handleSeatClick(seat)}
+                          disabled={!seat.is_available}
+                          title={`${seat.row_label}${seat.seat_number} - ${
+                            seat.ticket_price.toLocaleString('vi-VN')
+                          }đ`}
+                        >
+                          {seat.seat_number}
+                        </button>
+                      </React.Fragment>
                     ))}
                   </div>
                 </div>
@@ -217,6 +264,10 @@ const handleBooking = async () => {
                 <div className="seat seat-couple"></div>
                 <span>Đôi</span>
               </div>
+              <div className="legend-item">
+                <div className="seat seat-accessible"></div>
+                <span>Người khuyết tật</span>
+              </div>
               <div className="legend-item">
                 <div className="seat seat-selected"></div>
                 <span>Đang chọn</span>
@@ -83,8 +83,11 @@ export const authAPI = {
 
 // Movies API
 export const moviesAPI = {
+  // params.section: 'now_showing' | 'coming_soon' (bỏ trống: cả hai)
   getAll: (params) => api.get('/api/movies/', { params }),
   getById: (id) => api.get(`/api/movies/${id}/`),
+  // Gợi ý tên phim khi gõ (không cần dấu)
+  autocomplete: (q, limit) => api.get('/api/movies/autocomplete/', { params: { q, limit } }),
   create: (data) => api.post('/api/movies/', data),
   update: (id, data) => api.put(`/api/movies/${id}/`, data),
   delete: (id) => api.delete(`/api/movies/${id}/`),
@@ -103,11 +106,29 @@ export const showtimesAPI = {
   getAll: (params) => api.get('/api/showtime/', { params }),
   getById: (id) => api.get(`/api/showtime/${id}/`),
   getSeats: (id) => api.get(`/api/showtime/${id}/seats/`),
+  getSeatChanges: (id, since) => api.get(`/api/showtime/${id}/seats/changes/`, { params: { since } }),
+  // Luồng sự kiện ghế realtime (SSE)
+  seatEvents: (id) => new EventSource(`${API_URL}/api/showtime/${id}/seats/stream/`),
+  // Tự chọn ghế liền nhau tốt nhất và giữ chỗ
+  bestAvailable: (id, partySize, seatType) =>
+    api.post(`/api/showtime/${id}/best_available/`, { party_size: partySize, seat_type: seatType }),
+  // Phòng chờ: token nhận được gửi kèm header X-Queue-Token khi đặt vé
+  joinQueue: (id) => api.post(`/api/showtime/${id}/queue/join/`),
+  getQueueStatus: (id, token) => api.get(`/api/showtime/${id}/queue/status/`, { params: { token } }),
+  updateQueueSettings: (id, data) => api.patch(`/api/showtime/${id}/queue/settings/`, data),
   getByMovie: (movieId) => api.get('/api/showtime/by_movie/', { params: { movie_id: movieId } }),
   getToday: () => api.get('/api/showtime/today/'),
   getUpcoming: () => api.get('/api/showtime/upcoming/'),
-  adminAll: () => api.get('/api/showtime/admin_all/'), // ✅ THÊM: Endpoint phân nhóm theo trạng thái
+  // Dashboard admin: nhóm theo trạng thái (showing / upcoming / finished),
+  // mỗi nhóm { next, previous, results }; { bucket, cursor } cho trang sau
+  dashboard: (params) => api.get('/api/showtime/dashboard/', { params }),
+  // Trang tiếp theo theo link next (URL đầy đủ) của danh sách phân trang
+  nextPage: (url) => api.get(url),
   create: (data) => api.post('/api/showtime/', data),
+  // Tạo nhiều suất chiếu: [{ movie, auditorium, start_time, base_price }]
+  bulkCreate: (showtimes) => api.post('/api/showtime/bulk/', { showtimes }),
+  // Tự xếp lịch: commit=false để xem trước
+  generate: (data) => api.post('/api/showtime/generate/', data),
   update: (id, data) => api.put(`/api/showtime/${id}/`, data),
   delete: (id) => api.delete(`/api/showtime/${id}/`),
 };
@@ -120,14 +141,17 @@ export const auditoriumsAPI = {
   create: (data) => api.post('/api/auditoriums/', data),
   update: (id, data) => api.put(`/api/auditoriums/${id}/`, data),
   delete: (id) => api.delete(`/api/auditoriums/${id}/`),
-  regenerateSeats: (id) => api.post(`/api/auditoriums/${id}/regenerate_seats/`),
+  // layout (tùy chọn): sơ đồ dạng lưới { rows: [{ label, seats: 'SSSS..SSSS' }] }
+  regenerateSeats: (id, layout) =>
+    api.post(`/api/auditoriums/${id}/regenerate_seats/`, layout ? { layout } : {}),
 };
 
 // Bookings API
 export const bookingsAPI = {
   getAll: (params) => api.get('/api/booking/', { params }),
   getById: (id) => api.get(`/api/booking/${id}/`),
-  create: (data) => api.post('/api/booking/', data),
+  create: (data, queueToken) =>
+    api.post('/api/booking/', data, queueToken ? { headers: { 'X-Queue-Token': queueToken } } : undefined),
   cancel: (id) => api.post(`/api/booking/${id}/cancel/`),
   getHistory: (params) => api.get('/api/booking/history/', { params }),
   getUpcoming: () => api.get('/api/booking/upcoming/'),